@@ -11,19 +11,144 @@ import sys
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
+import copy
+import functools
+import io
+import itertools
 import json
 import logging
 import sqlite3
+import time
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
 import statistics
 
+try:
+    import orjson
+except ImportError:  # orjson 미설치 시 표준 json 사용
+    orjson = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 차트 지표 (daily_traffic 컬럼명과 동일)
+CHART_METRICS = ('players_online', 'cash_players', 'peak_24h', 'seven_day_avg')
+
+# 급변 크기별 잠재 뉴스 요인
+_MAJOR_NEWS_FACTORS = (
+    'Major tournament announcement',
+    'Platform update or maintenance',
+    'Promotional campaign launch',
+    'Regulatory news',
+    'Partnership announcement'
+)
+MAGNITUDE_NEWS_FACTORS = {
+    'MAJOR': _MAJOR_NEWS_FACTORS,
+    'ANOMALY': _MAJOR_NEWS_FACTORS,
+    'SIGNIFICANT': (
+        'Weekly tournament series',
+        'Bonus promotion',
+        'Software update',
+        'Market news'
+    )
+}
+
+# 사이트명 키워드별 특화 요인 (먼저 일치하는 항목 하나만 적용)
+SITE_NEWS_FACTORS = (
+    ('PokerStars', ('SCOOP/WCOOP event', 'EPT tournament', 'Sunday Million special')),
+    ('GG', ('WSOP satellite', 'GG Masters series', 'Bounty tournament')),
+    ('WPT', ('WPT500 series', 'World Poker Tour event'))
+)
+
+class _StdevAggregate:
+    """SQLite 표본 표준편차 집계 함수 (Welford 알고리즘, NULL 무시)"""
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        
+    def step(self, value):
+        if value is None:
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        
+    def finalize(self):
+        if self.count < 2:
+            return 0
+        return (self.m2 / (self.count - 1)) ** 0.5
+
 class GGPokerMonitoringPlatform:
+    # 사이트별 일별 최신 데이터 CTE (바인딩: site_name, days_back)
+    DAILY_LATEST_CTE = '''
+        WITH ranked AS (
+            SELECT
+                collection_date,
+                players_online,
+                cash_players,
+                peak_24h,
+                seven_day_avg,
+                ROW_NUMBER() OVER (
+                    PARTITION BY collection_date
+                    ORDER BY collection_time DESC
+                ) AS rn
+            FROM daily_traffic
+            WHERE site_name = ?
+            AND collection_date >= date('now', '-' || ? || ' days')
+        ),
+        daily_latest AS (
+            SELECT collection_date, players_online, cash_players, peak_24h, seven_day_avg
+            FROM ranked
+            WHERE rn = 1
+        )
+    '''
+
+    # 지표별 (count, min, max, avg, stdev) 집계 쿼리 - 0 이하 값은 NULL 처리로 제외
+    CHART_AGGREGATE_QUERY = DAILY_LATEST_CTE + 'SELECT ' + ', '.join(
+        f'COUNT(v_{m}), MIN(v_{m}), MAX(v_{m}), AVG(v_{m}), stdev(v_{m})' for m in CHART_METRICS
+    ) + ' FROM (SELECT ' + ', '.join(
+        f'CASE WHEN {m} > 0 THEN {m} END AS v_{m}' for m in CHART_METRICS
+    ) + ' FROM daily_latest)'
+
+    # 모니터링 우선순위 정렬 순서 (competitor_metadata.priority_rank 생성 컬럼)
+    PRIORITY_RANK_EXPR = (
+        "CASE monitoring_priority "
+        "WHEN 'CRITICAL' THEN 0 WHEN 'HIGH' THEN 1 WHEN 'MEDIUM' THEN 2 ELSE 3 END"
+    )
+
+    # 조회 결과 캐시 유효 시간 (초)
+    CACHE_TTL_SECONDS = 3600
+
+    # Chart.js 데이터셋 스타일 (정적 값, 호출마다 data만 채움)
+    DATASET_STYLES = {
+        'players_online': {
+            'label': 'Players Online',
+            'borderColor': 'rgb(75, 192, 192)',
+            'backgroundColor': 'rgba(75, 192, 192, 0.2)'
+        },
+        'cash_players': {
+            'label': 'Cash Players',
+            'borderColor': 'rgb(255, 99, 132)',
+            'backgroundColor': 'rgba(255, 99, 132, 0.2)'
+        },
+        'peak_24h': {
+            'label': '24h Peak',
+            'borderColor': 'rgb(54, 162, 235)',
+            'backgroundColor': 'rgba(54, 162, 235, 0.2)'
+        },
+        'seven_day_avg': {
+            'label': '7-day Average',
+            'borderColor': 'rgb(255, 206, 86)',
+            'backgroundColor': 'rgba(255, 206, 86, 0.2)'
+        }
+    }
+
     def __init__(self, db_path='gg_poker_monitoring.db'):
         self.db_path = db_path
+        # 인스턴스 수명 동안 재사용하는 연결 (페이지 캐시 유지)
+        self._conn = self._connect()
         self.setup_database()
         
         # 급변 감지 임계값
@@ -31,11 +156,36 @@ class GGPokerMonitoringPlatform:
         self.MAJOR_CHANGE_THRESHOLD = 25.0        # 25% 주요 변화
         self.ANOMALY_THRESHOLD = 50.0             # 50% 이상치
         
+        # 조회 결과 LRU 캐시 (적중률: cache_info()), 키에 데이터 버전 + TTL 구간 포함
+        self._chart_data_cache = functools.lru_cache(maxsize=256)(self._build_time_series_chart_data)
+        self._dashboard_cache = functools.lru_cache(maxsize=8)(self._build_competitor_dashboard_data)
+        
+    def _connect(self):
+        """SQLite 연결 생성 (컬럼명 접근용 Row 팩토리, stdev 집계 함수 등록)"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        conn.create_aggregate('stdev', 1, _StdevAggregate)
+        return conn
+        
+    def _cache_epoch(self):
+        """캐시 TTL 구간 번호 (다른 프로세스가 쓴 데이터도 TTL 안에 반영)"""
+        return int(time.time() // self.CACHE_TTL_SECONDS)
+        
+    def close(self):
+        """DB 연결 종료"""
+        self._conn.close()
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        
     def setup_database(self):
         """데이터베이스 스키마 설정"""
         logger.info("📊 데이터베이스 스키마 설정...")
         
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn
         cursor = conn.cursor()
         
         # 일일 트래픽 데이터 테이블 (시계열)
@@ -50,10 +200,51 @@ class GGPokerMonitoringPlatform:
                 peak_24h INTEGER,
                 seven_day_avg INTEGER,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP,
                 UNIQUE(site_name, collection_date, collection_time)
             )
         ''')
         
+        # 기존 DB 마이그레이션 (upsert 갱신 시각, migrate_to_supabase의 증분 기준)
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(daily_traffic)")}
+        if 'updated_at' not in columns:
+            cursor.execute('ALTER TABLE daily_traffic ADD COLUMN updated_at TIMESTAMP')
+        
+        # 사이트별 일별 최신 데이터 조회용 인덱스
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_dt_site_date_time
+            ON daily_traffic (site_name, collection_date, collection_time DESC)
+        ''')
+        
+        # 사이트별 최신 트래픽 (대시보드용, collect_daily_data에서 갱신)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS latest_traffic (
+                site_name TEXT PRIMARY KEY,
+                collection_date DATE NOT NULL,
+                collection_time TIME NOT NULL,
+                players_online INTEGER NOT NULL,
+                cash_players INTEGER NOT NULL,
+                peak_24h INTEGER,
+                seven_day_avg INTEGER
+            )
+        ''')
+        
+        # 최초 생성 시 기존 이력에서 사이트별 최신 행 채우기
+        cursor.execute('''
+            INSERT INTO latest_traffic
+            SELECT site_name, collection_date, collection_time, players_online,
+                   cash_players, peak_24h, seven_day_avg
+            FROM (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY site_name
+                    ORDER BY collection_date DESC, collection_time DESC
+                ) AS rn
+                FROM daily_traffic
+            )
+            WHERE rn = 1
+            AND NOT EXISTS (SELECT 1 FROM latest_traffic)
+        ''')
+        
         # 변화 감지 로그 테이블
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS change_detection (
@@ -86,7 +277,7 @@ class GGPokerMonitoringPlatform:
         ''')
         
         # 경쟁사 메타데이터 테이블
-        cursor.execute('''
+        cursor.execute(f'''
             CREATE TABLE IF NOT EXISTS competitor_metadata (
                 site_name TEXT PRIMARY KEY,
                 site_url TEXT,
@@ -96,33 +287,53 @@ class GGPokerMonitoringPlatform:
                 competitor_category TEXT,
                 notes TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                priority_rank INTEGER GENERATED ALWAYS AS ({self.PRIORITY_RANK_EXPR}) STORED
             )
         ''')
         
+        # 기존 DB 마이그레이션 (ALTER TABLE은 STORED 생성 컬럼을 추가할 수 없어 VIRTUAL 사용)
+        columns = {row[1] for row in cursor.execute("PRAGMA table_xinfo(competitor_metadata)")}
+        if 'priority_rank' not in columns:
+            cursor.execute(f'''
+                ALTER TABLE competitor_metadata
+                ADD COLUMN priority_rank INTEGER GENERATED ALWAYS AS ({self.PRIORITY_RANK_EXPR}) VIRTUAL
+            ''')
+            
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_cm_priority_rank
+            ON competitor_metadata (priority_rank)
+        ''')
+        
         conn.commit()
-        conn.close()
         logger.info("✅ 데이터베이스 스키마 설정 완료")
         
     def collect_daily_data(self, site_data_list):
         """일일 데이터 수집"""
         logger.info("📈 일일 데이터 수집 시작...")
         
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn
         cursor = conn.cursor()
         
-        collection_date = datetime.now().strftime('%Y-%m-%d')
-        collection_time = datetime.now().strftime('%H:%M:%S')
+        now = datetime.now()
+        collection_date = now.strftime('%Y-%m-%d')
+        collection_time = now.strftime('%H:%M:%S')
         
         collected_count = 0
         
         for site_data in site_data_list:
             try:
                 cursor.execute('''
-                    INSERT OR REPLACE INTO daily_traffic 
+                    INSERT INTO daily_traffic 
                     (site_name, collection_date, collection_time, players_online, 
                      cash_players, peak_24h, seven_day_avg)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (site_name, collection_date, collection_time) DO UPDATE SET
+                        players_online = excluded.players_online,
+                        cash_players = excluded.cash_players,
+                        peak_24h = excluded.peak_24h,
+                        seven_day_avg = excluded.seven_day_avg,
+                        updated_at = CURRENT_TIMESTAMP
                 ''', (
                     site_data['site_name'],
                     collection_date,
@@ -138,8 +349,29 @@ class GGPokerMonitoringPlatform:
             except Exception as e:
                 logger.error(f"데이터 수집 오류 - {site_data['site_name']}: {str(e)}")
                 
+        # 이번 수집분으로 사이트별 최신 트래픽 갱신
+        cursor.execute('''
+            INSERT INTO latest_traffic
+            (site_name, collection_date, collection_time, players_online,
+             cash_players, peak_24h, seven_day_avg)
+            SELECT site_name, collection_date, collection_time, players_online,
+                   cash_players, peak_24h, seven_day_avg
+            FROM daily_traffic
+            WHERE collection_date = ? AND collection_time = ?
+            ON CONFLICT (site_name) DO UPDATE SET
+                collection_date = excluded.collection_date,
+                collection_time = excluded.collection_time,
+                players_online = excluded.players_online,
+                cash_players = excluded.cash_players,
+                peak_24h = excluded.peak_24h,
+                seven_day_avg = excluded.seven_day_avg
+        ''', (collection_date, collection_time))
+        
         conn.commit()
-        conn.close()
+        
+        # 같은 시각 재수집(UPSERT)도 반영되도록 조회 캐시 무효화
+        self._chart_data_cache.cache_clear()
+        self._dashboard_cache.cache_clear()
         
         logger.info(f"✅ {collected_count}개 사이트 데이터 수집 완료")
         return collected_count
@@ -151,7 +383,7 @@ class GGPokerMonitoringPlatform:
             
         logger.info(f"🔍 {target_date} 변화 감지 시작...")
         
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn
         cursor = conn.cursor()
         
         # 현재 날짜와 이전 날짜 데이터 비교
@@ -191,7 +423,7 @@ class GGPokerMonitoringPlatform:
         detected_changes = []
         
         for row in results:
-            site_name = row[0]
+            site_name = row['site_name']
             changes = self.analyze_site_changes(row)
             
             for change in changes:
@@ -216,7 +448,6 @@ class GGPokerMonitoringPlatform:
                     detected_changes.append(change)
                     
         conn.commit()
-        conn.close()
         
         logger.info(f"🚨 {len(detected_changes)}개 유의미한 변화 감지")
         return detected_changes
@@ -264,25 +495,33 @@ class GGPokerMonitoringPlatform:
             return 'MINOR'
             
     def generate_time_series_chart_data(self, site_name, days_back=30):
-        """시계열 차트 데이터 생성"""
+        """시계열 차트 데이터 생성 (사이트 최신 수집 시점 기준 캐시)"""
         logger.info(f"📊 {site_name} 시계열 차트 데이터 생성 ({days_back}일)")
         
-        conn = sqlite3.connect(self.db_path)
+        # 오늘 날짜와 최신 수집 시점이 같으면 캐시된 결과 재사용
+        conn = self._conn
+        today, latest_ts = conn.execute('''
+            SELECT date('now'), MAX(collection_date || ' ' || collection_time)
+            FROM daily_traffic
+            WHERE site_name = ?
+        ''', (site_name,)).fetchone()
+        
+        if latest_ts is None:
+            return None
+            
+        chart_data = self._chart_data_cache(site_name, days_back, today, latest_ts, self._cache_epoch())
+        return copy.deepcopy(chart_data) if chart_data else None
+        
+    def _build_time_series_chart_data(self, site_name, days_back, today, latest_ts, cache_epoch):
+        """시계열 차트 데이터 조회 및 통계 계산 (today, latest_ts, cache_epoch는 캐시 키 용도)"""
+        conn = self._conn
         cursor = conn.cursor()
         
         # 일별 최신 데이터 조회
-        query = '''
-            SELECT 
-                collection_date,
-                players_online,
-                cash_players,
-                peak_24h,
-                seven_day_avg
-            FROM daily_traffic 
-            WHERE site_name = ? 
-            AND collection_date >= date('now', '-' || ? || ' days')
-            GROUP BY collection_date
-            HAVING collection_time = MAX(collection_time)
+        query = f'''
+            {self.DAILY_LATEST_CTE}
+            SELECT collection_date, players_online, cash_players, peak_24h, seven_day_avg
+            FROM daily_latest
             ORDER BY collection_date
         '''
         
@@ -292,71 +531,62 @@ class GGPokerMonitoringPlatform:
         if not results:
             return None
             
-        # 차트 데이터 구성
+        # 지표별 집계는 SQL에서 계산 (0 이하 값은 NULL로 제외)
+        cursor.execute(self.CHART_AGGREGATE_QUERY, (site_name, days_back))
+        aggregate_row = cursor.fetchone()
+        aggregates = {
+            metric: aggregate_row[i * 5:(i + 1) * 5]
+            for i, metric in enumerate(CHART_METRICS)
+        }
+            
+        # 행 → 컬럼 전치 (NULL 피크/7일 평균은 0으로 표시)
+        dates, players_online, cash_players, peak_24h, seven_day_avg = map(list, zip(*results))
+        series = {
+            'players_online': players_online,
+            'cash_players': cash_players,
+            'peak_24h': [v or 0 for v in peak_24h],
+            'seven_day_avg': [v or 0 for v in seven_day_avg]
+        }
+        
+        # 차트 데이터 구성 (고정 스타일 + 지표 데이터)
         chart_data = {
             'site_name': site_name,
             'period_days': days_back,
             'data_points': len(results),
-            'labels': [],  # X축 날짜
+            'labels': dates,  # X축 날짜
             'datasets': {
-                'players_online': {
-                    'label': 'Players Online',
-                    'data': [],
-                    'borderColor': 'rgb(75, 192, 192)',
-                    'backgroundColor': 'rgba(75, 192, 192, 0.2)'
-                },
-                'cash_players': {
-                    'label': 'Cash Players',
-                    'data': [],
-                    'borderColor': 'rgb(255, 99, 132)',
-                    'backgroundColor': 'rgba(255, 99, 132, 0.2)'
-                },
-                'peak_24h': {
-                    'label': '24h Peak',
-                    'data': [],
-                    'borderColor': 'rgb(54, 162, 235)',
-                    'backgroundColor': 'rgba(54, 162, 235, 0.2)'
-                },
-                'seven_day_avg': {
-                    'label': '7-day Average',
-                    'data': [],
-                    'borderColor': 'rgb(255, 206, 86)',
-                    'backgroundColor': 'rgba(255, 206, 86, 0.2)'
-                }
+                metric: {**style, 'data': series[metric]}
+                for metric, style in self.DATASET_STYLES.items()
             },
             'analytics': {}
         }
-        
-        for row in results:
-            chart_data['labels'].append(row[0])
-            chart_data['datasets']['players_online']['data'].append(row[1])
-            chart_data['datasets']['cash_players']['data'].append(row[2])
-            chart_data['datasets']['peak_24h']['data'].append(row[3] if row[3] is not None else 0)
-            chart_data['datasets']['seven_day_avg']['data'].append(row[4] if row[4] is not None else 0)
             
-        # 기본 통계 계산
-        chart_data['analytics'] = self.calculate_chart_analytics(chart_data)
+        # 기본 통계 계산 (집계값은 SQL, 시퀀스 기반 지표만 Python)
+        chart_data['analytics'] = self.calculate_chart_analytics(chart_data, aggregates)
         
-        conn.close()
         return chart_data
         
-    def calculate_chart_analytics(self, chart_data):
-        """차트 분석 데이터 계산"""
+    def calculate_chart_analytics(self, chart_data, aggregates):
+        """차트 분석 데이터 계산
+        
+        aggregates: 지표별 (count, min, max, avg, stdev) - CHART_AGGREGATE_QUERY 결과
+        """
         analytics = {}
         
         for metric_key, dataset in chart_data['datasets'].items():
-            values = [v for v in dataset['data'] if v is not None and v > 0]
+            count, min_val, max_val, mean_val, std_dev = aggregates[metric_key]
             
-            if values:
+            if count:
+                values = [v for v in dataset['data'] if v is not None and v > 0]
                 analytics[metric_key] = {
-                    'current': values[-1] if values else 0,
-                    'min': min(values),
-                    'max': max(values),
-                    'mean': round(statistics.mean(values), 1),
+                    'current': values[-1],
+                    'min': min_val,
+                    'max': max_val,
+                    'mean': round(mean_val, 1),
                     'median': round(statistics.median(values), 1),
-                    'std_dev': round(statistics.stdev(values), 1) if len(values) > 1 else 0,
-                    'trend': self.calculate_trend(values),
-                    'volatility': self.calculate_volatility(values),
+                    'std_dev': round(std_dev, 1) if count > 1 else 0,
+                    'trend': self.calculate_trend(values, mean_val),
+                    'volatility': self.calculate_volatility(count, mean_val, std_dev),
                     'recent_change_pct': self.calculate_recent_change(values)
                 }
             else:
@@ -364,15 +594,15 @@ class GGPokerMonitoringPlatform:
                 
         return analytics
         
-    def calculate_trend(self, values):
-        """트렌드 계산"""
+    def calculate_trend(self, values, mean_val):
+        """트렌드 계산 (mean_val: 전체 기간 평균)"""
         if len(values) < 3:
             return 'INSUFFICIENT_DATA'
             
         # 최근 7일 vs 이전 기간 비교
         if len(values) >= 7:
-            recent_avg = statistics.mean(values[-7:])
-            previous_avg = statistics.mean(values[:-7]) if len(values) > 7 else statistics.mean(values)
+            recent_avg = sum(values[-7:]) / 7
+            previous_avg = sum(values[:-7]) / (len(values) - 7) if len(values) > 7 else mean_val
             
             if recent_avg > previous_avg * 1.05:
                 return 'UPWARD'
@@ -389,13 +619,11 @@ class GGPokerMonitoringPlatform:
             else:
                 return 'STABLE'
                 
-    def calculate_volatility(self, values):
-        """변동성 계산"""
-        if len(values) < 2:
+    def calculate_volatility(self, count, mean_val, std_dev):
+        """변동성 계산 (SQL 집계된 평균/표준편차 기반 변동계수)"""
+        if count < 2:
             return 'LOW'
             
-        mean_val = statistics.mean(values)
-        std_dev = statistics.stdev(values)
         cv = (std_dev / mean_val) * 100 if mean_val > 0 else 0
         
         if cv >= 20:
@@ -443,37 +671,58 @@ class GGPokerMonitoringPlatform:
             {'name': 'Winamax', 'priority': 'LOW', 'category': 'NICHE', 'tier': 'Tier3'},
         ]
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for site in monitoring_sites:
-            network_info = 'GG Network' if site['category'] == 'OWN' else 'Independent'
-            notes = f"GG POKER 자사 데이터" if site['category'] == 'OWN' else f"GG POKER 경쟁사 모니터링 - {site['category']} 경쟁"
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO competitor_metadata 
-                (site_name, network_family, market_tier, monitoring_priority, 
-                 competitor_category, notes)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
+        rows = [
+            (
                 site['name'],
-                network_info,
+                'GG Network' if site['category'] == 'OWN' else 'Independent',
                 site['tier'],
                 site['priority'],
                 site['category'],
-                notes
-            ))
+                "GG POKER 자사 데이터" if site['category'] == 'OWN' else f"GG POKER 경쟁사 모니터링 - {site['category']} 경쟁"
+            )
+            for site in monitoring_sites
+        ]
+        
+        conn = self._conn
+        cursor = conn.cursor()
+        
+        cursor.executemany('''
+            INSERT INTO competitor_metadata 
+            (site_name, network_family, market_tier, monitoring_priority, 
+             competitor_category, notes)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (site_name) DO UPDATE SET
+                network_family = excluded.network_family,
+                market_tier = excluded.market_tier,
+                monitoring_priority = excluded.monitoring_priority,
+                competitor_category = excluded.competitor_category,
+                notes = excluded.notes,
+                updated_at = CURRENT_TIMESTAMP
+        ''', rows)
             
         conn.commit()
-        conn.close()
+        self._dashboard_cache.cache_clear()
         
         logger.info(f"✅ {len(monitoring_sites)}개 사이트 모니터링 설정 완료 (GG POKER 포함)")
         
     def get_competitor_dashboard_data(self):
-        """경쟁사 대시보드 데이터 (GG POKER 포함)"""
+        """경쟁사 대시보드 데이터 (GG POKER 포함, 최신 수집 시점 기준 캐시)"""
         logger.info("📊 경쟁사 대시보드 데이터 생성 (GG POKER 포함)...")
         
-        conn = sqlite3.connect(self.db_path)
+        latest_ts = self._conn.execute('''
+            SELECT MAX(collection_date || ' ' || collection_time) FROM latest_traffic
+        ''').fetchone()[0]
+        
+        dashboard_data = copy.deepcopy(self._dashboard_cache(latest_ts, self._cache_epoch()))
+        
+        now = datetime.now()
+        dashboard_data['generated_at'] = now.isoformat()
+        dashboard_data['data_date'] = now.strftime('%Y-%m-%d')
+        return dashboard_data
+        
+    def _build_competitor_dashboard_data(self, latest_ts, cache_epoch):
+        """경쟁사 대시보드 데이터 조회 (latest_ts, cache_epoch는 캐시 키 용도)"""
+        conn = self._conn
         cursor = conn.cursor()
         
         query = '''
@@ -487,16 +736,15 @@ class GGPokerMonitoringPlatform:
                 dt.peak_24h,
                 dt.seven_day_avg,
                 dt.collection_date,
-                dt.collection_time
+                dt.collection_time,
+                CASE WHEN dt.players_online AND dt.cash_players
+                    THEN ROUND(CAST(dt.cash_players AS REAL) / dt.players_online * 100, 1)
+                    ELSE 0 END AS cash_ratio
             FROM competitor_metadata cm
-            LEFT JOIN daily_traffic dt ON cm.site_name = dt.site_name
-            WHERE dt.collection_date = (SELECT MAX(collection_date) FROM daily_traffic)
+            LEFT JOIN latest_traffic dt ON cm.site_name = dt.site_name
+            WHERE dt.collection_date = (SELECT MAX(collection_date) FROM latest_traffic)
             ORDER BY 
-                CASE cm.monitoring_priority 
-                    WHEN 'CRITICAL' THEN 0
-                    WHEN 'HIGH' THEN 1 
-                    WHEN 'MEDIUM' THEN 2 
-                    ELSE 3 END,
+                cm.priority_rank,
                 dt.players_online DESC
         '''
         
@@ -504,8 +752,8 @@ class GGPokerMonitoringPlatform:
         results = cursor.fetchall()
         
         dashboard_data = {
-            'generated_at': datetime.now().isoformat(),
-            'data_date': datetime.now().strftime('%Y-%m-%d'),
+            'generated_at': None,  # 반환 시 설정
+            'data_date': None,
             'gg_poker_data': [],
             'high_priority_competitors': [],
             'medium_priority_competitors': [],
@@ -523,20 +771,23 @@ class GGPokerMonitoringPlatform:
         
         for row in results:
             site_data = {
-                'site_name': row[0],
-                'category': row[2],
-                'tier': row[3],
-                'players_online': row[4] or 0,
-                'cash_players': row[5] or 0,
-                'peak_24h': row[6] or 0,
-                'seven_day_avg': row[7] or 0,
-                'cash_ratio': round((row[5] / row[4]) * 100, 1) if row[4] and row[5] else 0,
-                'last_updated': f"{row[8]} {row[9]}" if row[8] and row[9] else 'N/A'
+                'site_name': row['site_name'],
+                'category': row['competitor_category'],
+                'tier': row['market_tier'],
+                'players_online': row['players_online'] or 0,
+                'cash_players': row['cash_players'] or 0,
+                'peak_24h': row['peak_24h'] or 0,
+                'seven_day_avg': row['seven_day_avg'] or 0,
+                'cash_ratio': row['cash_ratio'],
+                'last_updated': (
+                    f"{row['collection_date']} {row['collection_time']}"
+                    if row['collection_date'] and row['collection_time'] else 'N/A'
+                )
             }
             
             total_players += site_data['players_online']
             
-            priority = row[1]
+            priority = row['monitoring_priority']
             if priority == 'HIGH':
                 dashboard_data['high_priority_competitors'].append(site_data)
             elif priority == 'MEDIUM':
@@ -546,7 +797,6 @@ class GGPokerMonitoringPlatform:
                 
         dashboard_data['market_summary']['total_monitored_players'] = total_players
         
-        conn.close()
         return dashboard_data
         
     def analyze_news_correlation_for_changes(self, detected_changes):
@@ -586,45 +836,23 @@ class GGPokerMonitoringPlatform:
         
     def identify_potential_news_factors(self, change):
         """잠재적 뉴스 요인 식별"""
-        factors = []
-        
-        site_name = change['site_name']
-        magnitude = change['magnitude']
-        
-        # 급변 크기에 따른 가능한 요인들
-        if magnitude in ['MAJOR', 'ANOMALY']:
-            factors.extend([
-                'Major tournament announcement',
-                'Platform update or maintenance',
-                'Promotional campaign launch',
-                'Regulatory news',
-                'Partnership announcement'
-            ])
-        elif magnitude == 'SIGNIFICANT':
-            factors.extend([
-                'Weekly tournament series',
-                'Bonus promotion',
-                'Software update',
-                'Market news'
-            ])
-            
-        # 사이트별 특화 요인
-        if 'PokerStars' in site_name:
-            factors.extend(['SCOOP/WCOOP event', 'EPT tournament', 'Sunday Million special'])
-        elif 'GG' in site_name:
-            factors.extend(['WSOP satellite', 'GG Masters series', 'Bounty tournament'])
-        elif 'WPT' in site_name:
-            factors.extend(['WPT500 series', 'World Poker Tour event'])
-            
-        return factors[:3]  # 상위 3개 요인만 반환
+        # 급변 크기에 따른 가능한 요인들 + 사이트별 특화 요인
+        base_factors = MAGNITUDE_NEWS_FACTORS.get(change['magnitude'], ())
+        site_factors = next(
+            (factors for keyword, factors in SITE_NEWS_FACTORS if keyword in change['site_name']),
+            ()
+        )
+        
+        return list(itertools.islice(itertools.chain(base_factors, site_factors), 3))  # 상위 3개 요인만 반환
         
     def export_monitoring_report(self, date_range_days=7):
         """모니터링 리포트 내보내기"""
         logger.info(f"📋 모니터링 리포트 생성 ({date_range_days}일간)")
         
+        now = datetime.now()
         report = {
             'report_metadata': {
-                'generated_at': datetime.now().isoformat(),
+                'generated_at': now.isoformat(),
                 'report_type': 'gg_poker_monitoring_report',
                 'analysis_period_days': date_range_days,
                 'focus': 'competitor_analysis_and_change_detection'
@@ -641,7 +869,7 @@ class GGPokerMonitoringPlatform:
         report['competitor_analysis'] = competitor_data
         
         # 최근 변화 감지 요약
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -657,10 +885,10 @@ class GGPokerMonitoringPlatform:
         change_summary = cursor.fetchone()
         if change_summary:
             report['change_detection_summary'] = {
-                'total_changes': change_summary[0],
-                'anomaly_changes': change_summary[1],
-                'major_changes': change_summary[2],
-                'significant_changes': change_summary[3],
+                'total_changes': change_summary['total_changes'],
+                'anomaly_changes': change_summary['anomaly_count'],
+                'major_changes': change_summary['major_count'],
+                'significant_changes': change_summary['significant_count'],
                 'analysis_period': f'{date_range_days} days'
             }
             
@@ -669,31 +897,34 @@ class GGPokerMonitoringPlatform:
             'monitored_competitors': competitor_data['market_summary']['total_competitors'],
             'total_competitor_players': competitor_data['market_summary']['total_monitored_players'],
             'high_priority_competitors': len(competitor_data['high_priority_competitors']),
-            'significant_changes_detected': change_summary[0] if change_summary else 0,
+            'significant_changes_detected': change_summary['total_changes'] if change_summary else 0,
             'data_quality': 'GOOD',
             'monitoring_status': 'ACTIVE'
         }
         
         # 권고사항
-        if change_summary and change_summary[1] > 0:  # ANOMALY가 있는 경우
+        if change_summary and change_summary['anomaly_count'] > 0:  # ANOMALY가 있는 경우
             report['recommendations'].append({
                 'priority': 'HIGH',
-                'recommendation': f'{change_summary[1]}개 이상 징후 감지, 즉시 상세 분석 필요',
+                'recommendation': f"{change_summary['anomaly_count']}개 이상 징후 감지, 즉시 상세 분석 필요",
                 'action': 'INVESTIGATE'
             })
             
         # 리포트 저장
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        timestamp = now.strftime('%Y%m%d_%H%M%S')
         filename = f'gg_poker_monitoring_report_{timestamp}.json'
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
             
         # 간단한 텍스트 요약도 생성
         summary_filename = f'monitoring_summary_{timestamp}.txt'
         self.save_text_summary(report, summary_filename)
         
-        conn.close()
         
         logger.info(f"📊 리포트 저장: {filename}")
         logger.info(f"📄 요약 저장: {summary_filename}")
@@ -702,48 +933,55 @@ class GGPokerMonitoringPlatform:
         
     def save_text_summary(self, report, filename):
         """텍스트 요약 저장"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write("=" * 80 + "\n")
-            f.write("🎯 GG POKER 경쟁사 모니터링 리포트 요약\n")
-            f.write(f"생성 시간: {datetime.now().strftime('%Y년 %m월 %d일 %H시 %M분')}\n")
-            f.write("=" * 80 + "\n\n")
+        generated_at = datetime.fromisoformat(report['report_metadata']['generated_at'])
+        
+        buf = io.StringIO()
+        w = buf.write
+        
+        w("=" * 80 + "\n")
+        w("🎯 GG POKER 경쟁사 모니터링 리포트 요약\n")
+        w(f"생성 시간: {generated_at.strftime('%Y년 %m월 %d일 %H시 %M분')}\n")
+        w("=" * 80 + "\n\n")
+        
+        # 경영진 요약
+        summary = report['executive_summary']
+        w("📊 핵심 요약\n")
+        w("-" * 40 + "\n")
+        w(f"모니터링 경쟁사: {summary['monitored_competitors']}개\n")
+        w(f"경쟁사 총 플레이어: {summary['total_competitor_players']:,}명\n")
+        w(f"고우선순위 경쟁사: {summary['high_priority_competitors']}개\n")
+        w(f"감지된 유의미한 변화: {summary['significant_changes_detected']}건\n\n")
+        
+        # 고우선순위 경쟁사 현황
+        competitor_data = report['competitor_analysis']
+        if competitor_data['high_priority_competitors']:
+            w("🏆 고우선순위 경쟁사 현황\n")
+            w("-" * 40 + "\n")
+            for comp in competitor_data['high_priority_competitors']:
+                w(f"{comp['site_name']}: {comp['players_online']:,}명 "
+                  f"(캐시 {comp['cash_ratio']}%, 피크 {comp['peak_24h']:,}명)\n")
+            w("\n")
             
-            # 경영진 요약
-            summary = report['executive_summary']
-            f.write("📊 핵심 요약\n")
-            f.write("-" * 40 + "\n")
-            f.write(f"모니터링 경쟁사: {summary['monitored_competitors']}개\n")
-            f.write(f"경쟁사 총 플레이어: {summary['total_competitor_players']:,}명\n")
-            f.write(f"고우선순위 경쟁사: {summary['high_priority_competitors']}개\n")
-            f.write(f"감지된 유의미한 변화: {summary['significant_changes_detected']}건\n\n")
+        # 변화 감지 요약
+        change_summary = report.get('change_detection_summary', {})
+        if change_summary.get('total_changes', 0) > 0:
+            w("🚨 변화 감지 요약\n")
+            w("-" * 40 + "\n")
+            w(f"총 변화: {change_summary['total_changes']}건\n")
+            w(f"이상 징후 (ANOMALY): {change_summary['anomaly_changes']}건\n")
+            w(f"주요 변화 (MAJOR): {change_summary['major_changes']}건\n")
+            w(f"유의미한 변화 (SIGNIFICANT): {change_summary['significant_changes']}건\n\n")
             
-            # 고우선순위 경쟁사 현황
-            competitor_data = report['competitor_analysis']
-            if competitor_data['high_priority_competitors']:
-                f.write("🏆 고우선순위 경쟁사 현황\n")
-                f.write("-" * 40 + "\n")
-                for comp in competitor_data['high_priority_competitors']:
-                    f.write(f"{comp['site_name']}: {comp['players_online']:,}명 ")
-                    f.write(f"(캐시 {comp['cash_ratio']}%, 피크 {comp['peak_24h']:,}명)\n")
-                f.write("\n")
-                
-            # 변화 감지 요약
-            change_summary = report.get('change_detection_summary', {})
-            if change_summary.get('total_changes', 0) > 0:
-                f.write("🚨 변화 감지 요약\n")
-                f.write("-" * 40 + "\n")
-                f.write(f"총 변화: {change_summary['total_changes']}건\n")
-                f.write(f"이상 징후 (ANOMALY): {change_summary['anomaly_changes']}건\n")
-                f.write(f"주요 변화 (MAJOR): {change_summary['major_changes']}건\n")
-                f.write(f"유의미한 변화 (SIGNIFICANT): {change_summary['significant_changes']}건\n\n")
+        # 권고사항
+        if report['recommendations']:
+            w("💡 권고사항\n")
+            w("-" * 40 + "\n")
+            for rec in report['recommendations']:
+                w(f"[{rec['priority']}] {rec['recommendation']}\n")
+                w(f"조치: {rec['action']}\n\n")
                 
-            # 권고사항
-            if report['recommendations']:
-                f.write("💡 권고사항\n")
-                f.write("-" * 40 + "\n")
-                for rec in report['recommendations']:
-                    f.write(f"[{rec['priority']}] {rec['recommendation']}\n")
-                    f.write(f"조치: {rec['action']}\n\n")
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(buf.getvalue())
 
 def main():
     """메인 실행 함수"""
@@ -820,6 +1058,9 @@ def main():
     except Exception as e:
         logger.error(f"플랫폼 실행 오류: {str(e)}")
         return False
+        
+    finally:
+        platform.close()
 
 if __name__ == "__main__":
     success = main()
@@ -7,6 +7,7 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from crawlers.pokerscout_crawler import PokerScoutCrawler
 from crawlers.pokernews_crawler import PokerNewsCrawler
@@ -25,26 +26,32 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+def run_crawler(name, crawler_class):
+    """단일 크롤러 실행 (DB 세션이 작업 스레드에서 생성되도록 여기서 인스턴스화)"""
+    logger.info(f"Running {name} crawler...")
+    crawler_class().run()
+
 def run_crawlers():
-    """모든 크롤러 실행"""
+    """모든 크롤러 실행 (서로 독립적인 네트워크 작업이므로 동시 실행)"""
     logger.info("=== Starting daily crawl ===")
     start_time = datetime.now()
     
-    # PokerScout 크롤링
-    try:
-        logger.info("Running PokerScout crawler...")
-        scout_crawler = PokerScoutCrawler()
-        scout_crawler.run()
-    except Exception as e:
-        logger.error(f"PokerScout crawler failed: {str(e)}")
+    crawlers = {
+        'PokerScout': PokerScoutCrawler,
+        'PokerNews': PokerNewsCrawler
+    }
     
-    # PokerNews 크롤링
-    try:
-        logger.info("Running PokerNews crawler...")
-        news_crawler = PokerNewsCrawler()
-        news_crawler.run()
-    except Exception as e:
-        logger.error(f"PokerNews crawler failed: {str(e)}")
+    with ThreadPoolExecutor(max_workers=len(crawlers)) as executor:
+        futures = {
+            executor.submit(run_crawler, name, crawler_class): name
+            for name, crawler_class in crawlers.items()
+        }
+        
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"{futures[future]} crawler failed: {str(e)}")
     
     end_time = datetime.now()
     duration = (end_time - start_time).seconds
@@ -5,17 +5,41 @@ SQLite 데이터를 Supabase로 마이그레이션
 """
 
 import os
+import csv
+import io
 import sqlite3
 import json
 import logging
-from datetime import datetime
-from typing import List, Dict
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Tuple
 from supabase_config import SupabaseClient
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Supabase Postgres 직접 연결 URL (설정 시 REST 대신 COPY로 일괄 적재)
+SUPABASE_DB_URL = os.getenv('SUPABASE_DB_URL', '')
+
+# 마이그레이션 레코드 컬럼 순서 (병합 쿼리 SELECT 순서와 동일)
+MIGRATION_COLUMNS = (
+    'site_name',
+    'collection_date',
+    'collection_time',
+    'players_online',
+    'cash_players',
+    'peak_24h',
+    'seven_day_avg',
+    'created_at'
+)
+
+# 이 건수 이상 적재할 때는 보조 인덱스를 삭제 후 적재하고 재생성
+INDEX_REBUILD_THRESHOLD = 50000
+
+# 증분 마이그레이션 기준 시각 저장 파일 (원본 SQLite 파일별 마지막 적재 변경 시각)
+MIGRATION_STATE_FILE = '.migration_state.json'
+
 class DataMigrator:
     """데이터 마이그레이션 클래스"""
     
@@ -28,139 +52,294 @@ class DataMigrator:
             'online_poker_data.db'
         ]
     
-    def get_sqlite_data(self, db_path: str) -> List[Dict]:
-        """SQLite에서 데이터 추출"""
-        data = []
+    def attach_sqlite_sources(self, conn: sqlite3.Connection) -> Dict[str, str]:
+        """daily_traffic 데이터가 있는 SQLite 파일을 ATTACH하고 스키마 별칭 → 파일명 매핑 반환"""
+        schemas = {}
         
-        if not os.path.exists(db_path):
-            logger.warning(f"⚠️ 데이터베이스 파일 없음: {db_path}")
-            return data
+        for i, db_name in enumerate(self.sqlite_dbs):
+            db_path = os.path.join('.', db_name)
+            if not os.path.exists(db_path):
+                logger.warning("⚠️ 데이터베이스 파일 없음: %s", db_path)
+                continue
+            
+            schema = f"src{i}"
+            try:
+                # 읽기 전용 URI로 연결
+                conn.execute(
+                    f"ATTACH DATABASE ? AS {schema}",
+                    (Path(db_path).resolve().as_uri() + '?mode=ro',)
+                )
+                
+                # daily_traffic 존재 여부와 데이터 유무를 한 번에 확인 (테이블 없으면 OperationalError)
+                has_rows = conn.execute(
+                    f"SELECT EXISTS (SELECT 1 FROM {schema}.daily_traffic)"
+                ).fetchone()[0]
+            except sqlite3.OperationalError:
+                has_rows = False
+            except sqlite3.Error as e:
+                logger.error("❌ %s 데이터 추출 실패: %s", db_path, e)
+                has_rows = False
+            
+            if has_rows:
+                # 대량 읽기용 캐시/메모리 맵 확대
+                conn.execute(f"PRAGMA {schema}.cache_size = -262144")
+                conn.execute(f"PRAGMA {schema}.mmap_size = 1073741824")
+                schemas[schema] = db_name
+                logger.info("✅ %s 연결 (%s)", db_path, schema)
+            else:
+                logger.info("⏭️ %s: 마이그레이션할 daily_traffic 데이터 없음", db_path)
+                if schema in {row[1] for row in conn.execute("PRAGMA database_list")}:
+                    conn.execute(f"DETACH DATABASE {schema}")
+        
+        return schemas
+    
+    def load_high_water_marks(self) -> Dict[str, str]:
+        """원본 SQLite 파일별 마지막 적재 변경 시각 조회 (로컬 상태 파일)
         
+        Supabase의 MAX(created_at)는 온라인 수집기가 직접 쓴 행까지 포함하므로 기준으로 쓰지 않음
+        """
+        try:
+            with open(MIGRATION_STATE_FILE, 'r', encoding='utf-8') as f:
+                high_water = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("⚠️ 마이그레이션 상태 파일 읽기 실패: %s", e)
+            return {}
+        
+        if not isinstance(high_water, dict):
+            logger.warning("⚠️ 마이그레이션 상태 파일 형식 오류 - 전체 마이그레이션")
+            return {}
+        
+        # 알 수 없는 키(이전 형식의 사이트별 기준 등)는 무시
+        high_water = {
+            db_name: mark for db_name, mark in high_water.items()
+            if db_name in self.sqlite_dbs and isinstance(mark, str)
+        }
+        if high_water:
+            logger.info("📂 %s 기준으로 증분 마이그레이션", MIGRATION_STATE_FILE)
+        return high_water
+    
+    def save_high_water_marks(self, marks: Dict[str, str]):
+        """원본 SQLite 파일별 마지막 적재 변경 시각을 로컬 상태 파일에 저장"""
         try:
-            conn = sqlite3.connect(db_path)
-            conn.row_factory = sqlite3.Row  # 딕셔너리 형태로 반환
-            cursor = conn.cursor()
+            with open(MIGRATION_STATE_FILE, 'w', encoding='utf-8') as f:
+                json.dump(marks, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            logger.warning("⚠️ 마이그레이션 상태 파일 저장 실패: %s", e)
+    
+    def merge_and_deduplicate(self, high_water: Optional[Dict[str, str]] = None) -> Tuple[List[Dict], Dict[str, str]]:
+        """모든 SQLite 데이터베이스를 ATTACH해 한 번의 쿼리로 병합하고 중복 제거
+        
+        (site_name, collection_date, collection_time)별로 마지막으로 변경된 행을 유지
+        변경 시각은 COALESCE(updated_at, created_at)로, 수집기가 upsert할 때마다 갱신하는 로컬(UTC) 값
+        high_water가 주어지면 남은 행 중 원본 파일별 기준 시각 이후에 변경된 행만 추출 (증분 마이그레이션)
+        
+        (레코드 목록, 적재 후 저장할 파일별 기준 시각) 튜플 반환
+        """
+        high_water = dict(high_water or {})
+        conn = sqlite3.connect(':memory:', uri=True)
+        
+        try:
+            # GROUP BY 정렬용 임시 저장소는 메모리, 병합 연결은 조회 전용
+            conn.execute("PRAGMA temp_store = MEMORY")
+            conn.execute("PRAGMA query_only = 1")
+            schemas = self.attach_sqlite_sources(conn)
+            if not schemas:
+                return [], high_water
             
-            # daily_traffic 테이블 확인
-            cursor.execute("""
-                SELECT name FROM sqlite_master 
-                WHERE type='table' AND name='daily_traffic'
-            """)
+            selects = []
+            for schema in schemas:
+                # updated_at 컬럼이 추가되기 전의 파일은 created_at만으로 변경 시각 판단
+                columns = {row[1] for row in conn.execute(f"PRAGMA {schema}.table_info(daily_traffic)")}
+                changed_at = 'COALESCE(updated_at, created_at)' if 'updated_at' in columns else 'created_at'
+                selects.append(
+                    f"SELECT {', '.join(MIGRATION_COLUMNS)}, '{schema}' AS source, "
+                    f"julianday({changed_at}) AS changed_at FROM {schema}.daily_traffic"
+                )
+            union_sql = " UNION ALL ".join(selects)
             
-            if cursor.fetchone():
-                cursor.execute("""
+            # MAX()와 함께 쓰인 나머지 컬럼은 최댓값 행의 값을 따름 (SQLite bare column)
+            # 시각은 'T'/공백 구분 형식이 섞여 있으므로 문자열이 아닌 julianday로 비교
+            # 기준 시각과 같은 초의 행도 다시 보냄 (같은 초에 뒤늦게 커밋된 행 누락 방지, upsert라 중복 무해)
+            rows = conn.execute(f"""
+                SELECT merged.*, datetime(merged.changed_at)
+                FROM (
                     SELECT 
                         site_name,
                         collection_date,
                         collection_time,
-                        players_online,
-                        cash_players,
-                        peak_24h,
-                        seven_day_avg,
-                        created_at
-                    FROM daily_traffic
-                    ORDER BY collection_date DESC, collection_time DESC
-                """)
-                
-                rows = cursor.fetchall()
-                for row in rows:
-                    data.append({
-                        'site_name': row['site_name'],
-                        'collection_date': row['collection_date'],
-                        'collection_time': row['collection_time'],
-                        'players_online': row['players_online'] or 0,
-                        'cash_players': row['cash_players'] or 0,
-                        'peak_24h': row['peak_24h'] or 0,
-                        'seven_day_avg': row['seven_day_avg'] or 0,
-                        'created_at': row.get('created_at', datetime.now().isoformat())
-                    })
-                
-                logger.info(f"✅ {db_path}에서 {len(data)}개 레코드 추출")
+                        COALESCE(players_online, 0),
+                        COALESCE(cash_players, 0),
+                        COALESCE(peak_24h, 0),
+                        COALESCE(seven_day_avg, 0),
+                        COALESCE(created_at, CURRENT_TIMESTAMP),
+                        source,
+                        MAX(changed_at) AS changed_at
+                    FROM ({union_sql})
+                    GROUP BY site_name, collection_date, collection_time
+                ) AS merged
+                LEFT JOIN json_each(:high_water) AS hw ON hw.key = merged.source
+                WHERE julianday(hw.value) IS NULL
+                   OR merged.changed_at >= julianday(hw.value)
+            """, {
+                'high_water': json.dumps({
+                    schema: high_water[db_name]
+                    for schema, db_name in schemas.items()
+                    if db_name in high_water
+                })
+            }).fetchall()
             
+        except sqlite3.Error as e:
+            logger.error("❌ SQLite 데이터 병합 실패: %s", e)
+            return [], high_water
+        
+        finally:
             conn.close()
+        
+        column_count = len(MIGRATION_COLUMNS)
+        result = []
+        for row in rows:
+            result.append(dict(zip(MIGRATION_COLUMNS, row)))
             
-        except Exception as e:
-            logger.error(f"❌ {db_path} 데이터 추출 실패: {e}")
+            # 변경 시각이 없는 행(두 시각 모두 NULL)은 기준 시각에 반영하지 않음
+            source, changed_at = schemas[row[column_count]], row[-1]
+            if changed_at is not None and changed_at > high_water.get(source, ''):
+                high_water[source] = changed_at
         
-        return data
-    
-    def merge_and_deduplicate(self, all_data: List[List[Dict]]) -> List[Dict]:
-        """여러 데이터베이스의 데이터를 병합하고 중복 제거"""
-        merged = {}
-        
-        for data_list in all_data:
-            for record in data_list:
-                # 고유 키 생성 (사이트명 + 날짜 + 시간)
-                key = f"{record['site_name']}_{record['collection_date']}_{record['collection_time']}"
-                
-                # 중복이면 더 최신 데이터 유지
-                if key not in merged:
-                    merged[key] = record
-                elif record.get('created_at', '') > merged[key].get('created_at', ''):
-                    merged[key] = record
-        
-        result = list(merged.values())
-        logger.info(f"✅ 중복 제거 후 {len(result)}개 레코드")
-        return result
+        logger.info("✅ %d개 데이터베이스 병합, 중복 제거 후 %d개 레코드", len(schemas), len(result))
+        return result, high_water
     
-    def batch_insert(self, data: List[Dict], batch_size: int = 100) -> bool:
-        """배치 단위로 데이터 삽입"""
+    def batch_insert(self, data: List[Dict], batch_size: int = 500, max_workers: int = 8) -> bool:
+        """배치 단위로 데이터 삽입 (upsert이므로 배치 간 순서 무관, 병렬 요청)
+        
+        모든 배치가 성공했을 때만 True (일부라도 실패하면 증분 기준 시각을 올리지 않도록 False)
+        """
+        batches = [data[i:i + batch_size] for i in range(0, len(data), batch_size)]
         total_inserted = 0
         
-        for i in range(0, len(data), batch_size):
-            batch = data[i:i + batch_size]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.supabase_client.insert_daily_traffic, batch): (batch_no, batch)
+                for batch_no, batch in enumerate(batches, 1)
+            }
             
-            try:
-                if self.supabase_client.insert_daily_traffic(batch):
-                    total_inserted += len(batch)
-                    logger.info(f"✅ 배치 {i//batch_size + 1}: {len(batch)}개 삽입 완료")
-                else:
-                    logger.error(f"❌ 배치 {i//batch_size + 1} 삽입 실패")
-                    
-            except Exception as e:
-                logger.error(f"❌ 배치 삽입 오류: {e}")
-        
-        logger.info(f"🎯 총 {total_inserted}개 레코드 삽입 완료")
-        return total_inserted > 0
-    
-    def run_migration(self) -> bool:
-        """전체 마이그레이션 실행"""
-        logger.info("🚀 SQLite → Supabase 마이그레이션 시작")
+            for future in as_completed(futures):
+                batch_no, batch = futures[future]
+                try:
+                    if future.result():
+                        total_inserted += len(batch)
+                        # 배치별 로그는 10개 단위로만 출력
+                        if batch_no % 10 == 1:
+                            logger.info("✅ 배치 %d: %d개 삽입 완료", batch_no, len(batch))
+                    else:
+                        logger.error("❌ 배치 %d 삽입 실패", batch_no)
+                        
+                except Exception as e:
+                    logger.error("❌ 배치 삽입 오류: %s", e)
         
-        # 1. Supabase 연결 테스트
-        if not self.supabase_client.test_connection():
-            logger.error("❌ Supabase 연결 실패")
+        logger.info("🎯 총 %d개 레코드 삽입 완료", total_inserted)
+        if total_inserted < len(data):
+            logger.error("❌ %d개 레코드 삽입 실패 - 다음 실행에서 다시 시도", len(data) - total_inserted)
             return False
+        return True
+    
+    def copy_insert(self, data: List[Dict]) -> bool:
+        """Postgres 직접 연결로 COPY 일괄 적재 (임시 스테이징 테이블 → ON CONFLICT upsert)"""
+        import psycopg2
         
-        # 2. 테이블 생성
-        if not self.supabase_client.create_tables():
-            logger.error("❌ 테이블 생성 실패")
-            return False
+        columns = ', '.join(MIGRATION_COLUMNS)
+        update_columns = ', '.join(
+            f"{column} = EXCLUDED.{column}"
+            for column in MIGRATION_COLUMNS[3:]
+        )
         
-        # 3. 모든 SQLite 데이터베이스에서 데이터 추출
-        all_data = []
-        for db_name in self.sqlite_dbs:
-            db_path = os.path.join('.', db_name)
-            data = self.get_sqlite_data(db_path)
-            if data:
-                all_data.append(data)
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            [record[column] for column in MIGRATION_COLUMNS] for record in data
+        )
+        buffer.seek(0)
         
-        if not all_data:
-            logger.warning("⚠️ 마이그레이션할 데이터가 없습니다")
+        conn = None
+        try:
+            conn = psycopg2.connect(SUPABASE_DB_URL)
+            with conn, conn.cursor() as cursor:
+                cursor.execute("""
+                    CREATE TEMP TABLE daily_traffic_staging
+                    (LIKE daily_traffic INCLUDING DEFAULTS) ON COMMIT DROP
+                """)
+                cursor.copy_expert(
+                    f"COPY daily_traffic_staging ({columns}) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+                cursor.execute(f"""
+                    INSERT INTO daily_traffic ({columns})
+                    SELECT {columns} FROM daily_traffic_staging
+                    ON CONFLICT (site_name, collection_date, collection_time)
+                    DO UPDATE SET {update_columns}
+                """)
+            
+            logger.info("🎯 COPY로 총 %d개 레코드 적재 완료", len(data))
+            return True
+            
+        except Exception as e:
+            logger.error("❌ COPY 적재 오류: %s", e)
             return False
         
-        # 4. 데이터 병합 및 중복 제거
-        merged_data = self.merge_and_deduplicate(all_data)
+        finally:
+            if conn is not None:
+                conn.close()
+    
+    def run_migration(self) -> bool:
+        """전체 마이그레이션 실행"""
+        logger.info("🚀 SQLite → Supabase 마이그레이션 시작")
+        
+        # 원본 파일별 마지막 적재 변경 시각 (이후 변경된 행만 마이그레이션)
+        high_water = self.load_high_water_marks()
+        
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # 3-4. 모든 SQLite 데이터베이스에서 데이터 추출, 병합 및 중복 제거 (단일 SQL)
+            #      로컬 디스크 작업이므로 아래 Supabase 네트워크 요청과 병행
+            merge_future = executor.submit(self.merge_and_deduplicate, high_water)
+            
+            # 1. Supabase 연결 테스트
+            if not self.supabase_client.test_connection():
+                logger.error("❌ Supabase 연결 실패")
+                return False
+            
+            # 2. 테이블 생성
+            if not self.supabase_client.create_tables():
+                logger.error("❌ 테이블 생성 실패")
+                return False
+            
+            merged_data, new_high_water = merge_future.result()
         
         if not merged_data:
-            logger.warning("⚠️ 병합할 데이터가 없습니다")
+            if high_water:
+                logger.info("✅ 마지막 마이그레이션 이후 새 데이터가 없습니다")
+                return True
+            logger.warning("⚠️ 마이그레이션할 데이터가 없습니다")
             return False
         
-        # 5. Supabase에 데이터 삽입
-        success = self.batch_insert(merged_data)
+        # 5. Supabase에 데이터 삽입 (DB 직접 연결이 설정되어 있으면 COPY 사용)
+        #    대량 적재 시 행마다 인덱스를 갱신하지 않도록 보조 인덱스를 삭제 후 재생성
+        rebuild_indexes = (
+            len(merged_data) >= INDEX_REBUILD_THRESHOLD
+            and self.supabase_client.drop_daily_traffic_indexes()
+        )
+        try:
+            if SUPABASE_DB_URL:
+                success = self.copy_insert(merged_data)
+            else:
+                success = self.batch_insert(merged_data)
+        finally:
+            if rebuild_indexes and not self.supabase_client.create_daily_traffic_indexes():
+                logger.error("❌ daily_traffic 인덱스 재생성 실패 - create_tables()로 복구하세요")
         
         if success:
             logger.info("✅ 마이그레이션 완료")
+            # 전체 적재가 성공한 경우에만 기준 시각 갱신 (실패한 행이 다음 증분에서 걸러지지 않도록)
+            self.save_high_water_marks(new_high_water)
             
             # 6. 마이그레이션 결과 검증
             dashboard_data = self.supabase_client.get_dashboard_data()
@@ -179,6 +358,9 @@ SUPABASE_URL=https://your-project-id.supabase.co
 SUPABASE_ANON_KEY=your-anon-key-here
 SUPABASE_SERVICE_KEY=your-service-role-key-here
 
+# (선택) Postgres 직접 연결 - 설정 시 마이그레이션을 COPY로 일괄 적재
+SUPABASE_DB_URL=
+
 # 사용법:
 # 1. Supabase 프로젝트를 생성하세요
 # 2. Settings > API에서 URL과 키들을 복사하세요
@@ -14,8 +14,16 @@ import logging
 import requests
 from datetime import datetime, timedelta
 import cloudscraper
-from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
 import re
+import weakref
+from urllib.parse import urlparse
+from scraper_utils import load_scraper_session, save_scraper_session
+
+try:
+    import orjson
+except ImportError:  # orjson 미설치 시 표준 json 사용
+    orjson = None
 
 # 환경변수에 따른 데이터베이스 설정
 DB_TYPE = os.getenv('DB_TYPE', 'postgresql')  # postgresql, mysql, sqlite  
@@ -23,12 +31,88 @@ DATABASE_URL = os.getenv('DATABASE_URL', '')
 
 if DB_TYPE == 'postgresql':
     import psycopg2
+    import psycopg2.pool
     from psycopg2.extras import RealDictCursor
 elif DB_TYPE == 'mysql':
     import pymysql
 else:
     import sqlite3
 
+# 사이트명 정규화 매핑 (소문자 원본명 → 표준명, 표준명은 intern하여 같은 객체 공유)
+SITE_NAME_MAPPING = {
+    raw: sys.intern(canonical)
+    for raw, canonical in {
+        'ggnetwork': 'GGNetwork',
+        'gg network': 'GGNetwork',
+        'ggpoker': 'GGNetwork',
+        'gg poker': 'GGNetwork',
+        'ggpoker on': 'GGPoker ON',
+        'pokerstars': 'PokerStars',
+        'pokerstars ontario': 'PokerStars Ontario',
+        'wpt global': 'WPT Global',
+        '888poker': '888poker',
+        'partypoker': 'partypoker',
+        'chico poker': 'Chico Poker',
+        'ipoker': 'iPoker',
+        'winamax': 'Winamax'
+    }.items()
+}
+
+# GG POKER 식별용 - 정규화된 사이트명은 집합 조회, 나머지 변형 이름은 정규식으로 확인
+GG_POKER_CANONICAL = frozenset({sys.intern('GGNetwork'), sys.intern('GGPoker ON')})
+GG_POKER_PATTERN = re.compile(r'GGNetwork|GG ?Poker')
+
+def is_gg_poker_site(site_name):
+    """GG POKER 계열 사이트 여부"""
+    return site_name in GG_POKER_CANONICAL or GG_POKER_PATTERN.search(site_name) is not None
+
+def _collection_totals(site_data_list):
+    """저장한 사이트 목록의 (사이트 수, GG POKER 사이트 수, 총 플레이어) 계산"""
+    return (
+        len(site_data_list),
+        sum(1 for site_data in site_data_list if is_gg_poker_site(site_data['site_name'])),
+        sum(site_data['players_online'] for site_data in site_data_list)
+    )
+
+def _parse_int(text):
+    """쉼표가 포함된 숫자 문자열을 정수로 변환 (숫자가 아니면 0)"""
+    try:
+        return int(text.replace(',', ''))
+    except ValueError:
+        return 0
+
+# PokerScout 순위 테이블 XPath (모듈 로드 시 한 번만 컴파일)
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+RANK_TABLE_XPATH = etree.XPath(f"//table[{_has_class('rankTable')}]")
+RANK_ROWS_XPATH = etree.XPath(
+    f"descendant::tr[position() > 1][not({_has_class('cus_top_traffic_coin')})]"
+)
+# 사이트명, Players Online, Cash Players, 24H Peak, 7 Day Average를 탭으로 구분한 문자열
+ROW_FIELDS_XPATH = etree.XPath(
+    f"concat("
+    f"normalize-space(.//span[{_has_class('brand-title')}]), '\t', "
+    f"normalize-space(.//td[@id='online']//span), '\t', "
+    f"normalize-space(.//td[@id='cash']), '\t', "
+    f"normalize-space(.//td[@id='peak']), '\t', "
+    f"normalize-space(.//td[@id='avg'])"
+    f")"
+)
+
+def parse_pokerscout_rows(doc):
+    """PokerScout 문서에서 (사이트명, 접속자, 캐시, 24H 피크, 7일 평균) 문자열 행 목록 추출
+    
+    순위 테이블이 없으면 None 반환. 인스턴스 상태를 쓰지 않으므로 워커 스레드에서도 호출 가능
+    (XPath 문자열 결과는 예외를 내지 않으므로 행별 try/except 불필요)
+    """
+    tables = RANK_TABLE_XPATH(doc)
+    if not tables:
+        return None
+    
+    # 헤더/광고 행 제외, 행마다 한 번의 XPath 평가
+    return [ROW_FIELDS_XPATH(row).split('\t') for row in RANK_ROWS_XPATH(tables[0])]
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -40,6 +124,117 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# DSN별 PostgreSQL 연결 풀 (같은 프로세스의 수집기 인스턴스 간 연결 공유)
+_PG_POOLS = {}
+
+def _get_pg_pool(dsn):
+    """DSN에 해당하는 연결 풀 반환 (첫 호출 시 연결 1개로 생성)"""
+    if dsn not in _PG_POOLS:
+        _PG_POOLS[dsn] = psycopg2.pool.SimpleConnectionPool(1, 5, dsn)
+    return _PG_POOLS[dsn]
+
+# 테이블 정의 (PostgreSQL/MySQL/SQLite 공통, id 컬럼만 DB별로 채움)
+TABLE_SCHEMAS = (
+    """
+    CREATE TABLE IF NOT EXISTS daily_traffic (
+        {id_column},
+        site_name VARCHAR(100) NOT NULL,
+        collection_date DATE NOT NULL,
+        collection_time TIME NOT NULL,
+        players_online INTEGER NOT NULL,
+        cash_players INTEGER NOT NULL,
+        peak_24h INTEGER,
+        seven_day_avg INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(site_name, collection_date, collection_time)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS collection_stats (
+        {id_column},
+        collection_date DATE NOT NULL,
+        collection_time TIME NOT NULL,
+        total_sites INTEGER,
+        gg_poker_sites INTEGER,
+        total_players INTEGER,
+        success BOOLEAN DEFAULT TRUE,
+        error_message TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS poker_events (
+        {id_column},
+        event_date DATE NOT NULL,
+        event_title VARCHAR(500) NOT NULL,
+        event_type VARCHAR(50) NOT NULL,
+        affected_sites TEXT,
+        impact_level VARCHAR(20),
+        description TEXT,
+        news_url TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """
+)
+
+# daily_traffic upsert (PostgreSQL과 SQLite 3.24+ 공통 문법, 입력 행 자리 {source}는 DB별로 채움)
+# SQLite도 INSERT OR REPLACE(삭제 후 재삽입) 대신 기존 행을 그 자리에서 갱신
+DAILY_TRAFFIC_UPSERT_SQL = """
+    INSERT INTO daily_traffic 
+    (site_name, collection_date, collection_time, players_online, 
+     cash_players, peak_24h, seven_day_avg)
+    {source}
+    ON CONFLICT (site_name, collection_date, collection_time) 
+    DO UPDATE SET 
+        players_online = EXCLUDED.players_online,
+        cash_players = EXCLUDED.cash_players,
+        peak_24h = EXCLUDED.peak_24h,
+        seven_day_avg = EXCLUDED.seven_day_avg
+"""
+
+# SQLite 파일은 migrate_to_supabase가 변경 시각 기준으로 증분 적재하므로 갱신 시각도 기록
+SQLITE_DAILY_TRAFFIC_UPSERT_SQL = DAILY_TRAFFIC_UPSERT_SQL.rstrip() + """,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# PostgreSQL 저장 문장: 컬럼별 배열을 unnest해 upsert하고 같은 문장에서 수집 통계까지 삽입
+# 사이트 수와 무관하게 문장 모양이 고정되므로 연결마다 한 번 PREPARE해 두고 EXECUTE로 재사용
+PG_SAVE_PARAMS = (
+    'site_names', 'collection_date', 'collection_time',
+    'players_online', 'cash_players', 'peak_24h', 'seven_day_avg',
+    'total_sites', 'gg_poker_sites', 'total_players'
+)
+PG_SAVE_SQL = f"""
+    WITH upserted AS ({DAILY_TRAFFIC_UPSERT_SQL.format(source='''
+        SELECT site_name, %(collection_date)s::date, %(collection_time)s::time,
+               players_online, cash_players, peak_24h, seven_day_avg
+        FROM unnest(%(site_names)s::text[], %(players_online)s::int[], %(cash_players)s::int[],
+                    %(peak_24h)s::int[], %(seven_day_avg)s::int[])
+            AS t(site_name, players_online, cash_players, peak_24h, seven_day_avg)
+    ''')})
+    INSERT INTO collection_stats 
+    (collection_date, collection_time, total_sites, gg_poker_sites, total_players)
+    VALUES (%(collection_date)s::date, %(collection_time)s::time,
+            %(total_sites)s, %(gg_poker_sites)s, %(total_players)s)
+"""
+PG_SAVE_PREPARE_SQL = 'PREPARE save_daily_traffic AS ' + re.sub(
+    r'%\((\w+)\)s', lambda match: f'${PG_SAVE_PARAMS.index(match.group(1)) + 1}', PG_SAVE_SQL
+)
+PG_SAVE_EXECUTE_SQL = f"EXECUTE save_daily_traffic ({', '.join(['%s'] * len(PG_SAVE_PARAMS))})"
+
+# save_daily_traffic를 PREPARE한 연결 (풀에서 같은 연결을 다시 빌리면 재사용)
+_PREPARED_CONNECTIONS = weakref.WeakSet()
+
+def _tune_sqlite(conn):
+    """SQLite 연결에 쓰기 성능용 PRAGMA 적용 (WAL + synchronous=NORMAL로 커밋마다 fsync 방지)"""
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA cache_size=-64000')
+    conn.execute('PRAGMA mmap_size=268435456')
+    conn.execute('PRAGMA busy_timeout=5000')
+    return conn
+
 class OnlineDataCollector:
     def __init__(self):
         self.db_url = DATABASE_URL
@@ -47,18 +242,60 @@ class OnlineDataCollector:
         self.use_sqlite_fallback = not bool(DATABASE_URL)
         # 정확한 데이터를 위해 올바른 CloudScraper 설정 사용 (방법 1)
         self.scraper = cloudscraper.create_scraper()
-        # PokerScout의 모든 사이트를 수집하므로 특정 타겟 제한 없음
-        self.gg_poker_sites = ['GGNetwork', 'GGPoker ON', 'GG Poker', 'GGPoker']  # GG POKER 식별용
+        self.scraper.headers.update({'Connection': 'keep-alive'})
+        restored = load_scraper_session(self.scraper)
+        if restored:
+            logger.info(f"Restored Cloudflare session ({restored} cookies)")
+        # PokerScout의 모든 사이트를 수집하므로 특정 타겟 제한 없음 (GG POKER는 is_gg_poker_site로 식별)
+        # 실행 동안 재사용하는 DB 연결 (PostgreSQL TLS 핸드셰이크를 한 번만 수행)
+        self._conn = None
+        self._pool = None  # PostgreSQL 연결을 빌려온 풀 (close 시 반납)
+        self._use_prepared = False  # PostgreSQL 저장 문장을 PREPARE/EXECUTE로 실행할지 여부
         self.setup_database()
         
     def get_db_connection(self):
-        """데이터베이스 연결"""
+        """데이터베이스 연결 (한 번 연결한 뒤에는 같은 연결 재사용)"""
+        if self._conn is not None and getattr(self._conn, 'closed', False):
+            # 끊긴 풀 연결이 풀 슬롯을 계속 차지하지 않도록 반납 후 재연결
+            self._discard_connection()
+        if self._conn is None:
+            self._conn = self._connect()
+        return self._conn
+    
+    def close(self):
+        """재사용 중인 DB 연결 종료"""
+        if self._conn is not None:
+            if self._pool is not None:
+                self._pool.putconn(self._conn)
+                self._pool = None
+            else:
+                if self.use_sqlite_fallback or DB_TYPE not in ('postgresql', 'mysql'):
+                    # SQLite는 종료 전에 쿼리 플래너 통계 갱신
+                    self._conn.execute('PRAGMA optimize')
+                self._conn.close()
+            self._conn = None
+    
+    def _discard_connection(self):
+        """사용할 수 없게 된 연결 폐기 (풀 연결은 풀에서도 제거)"""
+        conn, self._conn = self._conn, None
+        try:
+            if self._pool is not None:
+                self._pool.putconn(conn, close=True)
+            else:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"Failed to discard connection: {str(e)}")
+        finally:
+            self._pool = None
+    
+    def _connect(self):
+        """새 데이터베이스 연결 생성"""
         try:
             # SQLite fallback이 활성화된 경우
             if self.use_sqlite_fallback:
                 logger.info("Using SQLite fallback mode")
                 import sqlite3
-                return sqlite3.connect('github_actions_fallback.db')
+                return _tune_sqlite(sqlite3.connect('github_actions_fallback.db'))
             
             if DB_TYPE == 'postgresql':
                 if not self.db_url:
@@ -68,18 +305,26 @@ class OnlineDataCollector:
                 if 'supabase.co' in self.db_url:
                     logger.info("Optimizing Supabase connection...")
                     if '?' in self.db_url:
-                        optimized_url = self.db_url + '&connect_timeout=10&application_name=poker-insight'
+                        dsn = self.db_url + '&connect_timeout=10&application_name=poker-insight'
                     else:
-                        optimized_url = self.db_url + '?connect_timeout=10&application_name=poker-insight'
-                    return psycopg2.connect(optimized_url)
+                        dsn = self.db_url + '?connect_timeout=10&application_name=poker-insight'
                 else:
-                    return psycopg2.connect(self.db_url)
+                    dsn = self.db_url
+                
+                # Supabase 트랜잭션 풀러(6543)는 트랜잭션마다 백엔드가 바뀌어 PREPARE 문장을 유지하지 못함
+                self._use_prepared = urlparse(dsn).port != 6543
+                
+                # 풀에서 연결을 빌려 사용 (close 시 끊지 않고 반납)
+                pool = _get_pg_pool(dsn)
+                conn = pool.getconn()
+                self._pool = pool
+                return conn
             elif DB_TYPE == 'mysql':
                 if not self.db_url:
                     raise ValueError("DATABASE_URL is not set")
                 return pymysql.connect(self.db_url)
             else:
-                return sqlite3.connect('online_poker_data.db')
+                return _tune_sqlite(sqlite3.connect('online_poker_data.db'))
         except Exception as e:
             logger.error(f"Database connection failed: {str(e)}")
             logger.error(f"DB_TYPE: {DB_TYPE}")
@@ -93,7 +338,7 @@ class OnlineDataCollector:
                 self.use_sqlite_fallback = True
                 try:
                     import sqlite3
-                    conn = sqlite3.connect('github_actions_fallback.db')
+                    conn = _tune_sqlite(sqlite3.connect('github_actions_fallback.db'))
                     logger.info("SQLite fallback enabled successfully")
                     return conn
                 except Exception as fallback_error:
@@ -117,100 +362,38 @@ class OnlineDataCollector:
             conn = self.get_db_connection()
             cursor = conn.cursor()
             
-            # PostgreSQL/MySQL용 SQL (SQLite fallback이 아닌 경우)
+            # DB 종류별로 다른 부분은 id 컬럼 정의와 daily_traffic 보조 인덱스뿐
             if not self.use_sqlite_fallback and DB_TYPE in ['postgresql', 'mysql']:
-                sql_commands = [
-                    """
-                    CREATE TABLE IF NOT EXISTS daily_traffic (
-                        id SERIAL PRIMARY KEY,
-                        site_name VARCHAR(100) NOT NULL,
-                        collection_date DATE NOT NULL,
-                        collection_time TIME NOT NULL,
-                        players_online INTEGER NOT NULL,
-                        cash_players INTEGER NOT NULL,
-                        peak_24h INTEGER,
-                        seven_day_avg INTEGER,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        UNIQUE(site_name, collection_date, collection_time)
-                    )
-                    """,
-                    """
-                    CREATE TABLE IF NOT EXISTS collection_stats (
-                        id SERIAL PRIMARY KEY,
-                        collection_date DATE NOT NULL,
-                        collection_time TIME NOT NULL,
-                        total_sites INTEGER,
-                        gg_poker_sites INTEGER,
-                        total_players INTEGER,
-                        success BOOLEAN DEFAULT TRUE,
-                        error_message TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                    """,
-                    """
-                    CREATE TABLE IF NOT EXISTS poker_events (
-                        id SERIAL PRIMARY KEY,
-                        event_date DATE NOT NULL,
-                        event_title VARCHAR(500) NOT NULL,
-                        event_type VARCHAR(50) NOT NULL,
-                        affected_sites TEXT,
-                        impact_level VARCHAR(20),
-                        description TEXT,
-                        news_url TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                    """
-                ]
+                id_column = 'id SERIAL PRIMARY KEY'
             else:
-                # SQLite용 SQL (로컬 테스트용)
-                sql_commands = [
-                    """
-                    CREATE TABLE IF NOT EXISTS daily_traffic (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        site_name TEXT NOT NULL,
-                        collection_date DATE NOT NULL,
-                        collection_time TIME NOT NULL,
-                        players_online INTEGER NOT NULL,
-                        cash_players INTEGER NOT NULL,
-                        peak_24h INTEGER,
-                        seven_day_avg INTEGER,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        UNIQUE(site_name, collection_date, collection_time)
-                    )
-                    """,
-                    """
-                    CREATE TABLE IF NOT EXISTS collection_stats (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        collection_date DATE NOT NULL,
-                        collection_time TIME NOT NULL,
-                        total_sites INTEGER,
-                        gg_poker_sites INTEGER,
-                        total_players INTEGER,
-                        success BOOLEAN DEFAULT TRUE,
-                        error_message TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                    """,
-                    """
-                    CREATE TABLE IF NOT EXISTS poker_events (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        event_date DATE NOT NULL,
-                        event_title TEXT NOT NULL,
-                        event_type TEXT NOT NULL,
-                        affected_sites TEXT,
-                        impact_level TEXT,
-                        description TEXT,
-                        news_url TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                    """
-                ]
+                # SQLite (로컬 테스트용)
+                id_column = 'id INTEGER PRIMARY KEY AUTOINCREMENT'
+            
+            sql_commands = [sql.format(id_column=id_column) for sql in TABLE_SCHEMAS]
+            
+            if self.use_sqlite_fallback or DB_TYPE not in ['postgresql', 'mysql']:
+                sql_commands.append("""
+                    CREATE INDEX IF NOT EXISTS idx_daily_traffic_date_site
+                    ON daily_traffic (collection_date, site_name)
+                """)
+            elif DB_TYPE == 'postgresql':
+                # 날짜 범위 조회용 커버링 인덱스 (힙 접근 없이 수치 컬럼까지 인덱스에서 읽음)
+                sql_commands.append("""
+                    CREATE INDEX IF NOT EXISTS idx_daily_traffic_date_site
+                    ON daily_traffic (collection_date DESC, site_name)
+                    INCLUDE (players_online, cash_players, peak_24h, seven_day_avg)
+                """)
             
             for sql in sql_commands:
                 cursor.execute(sql)
             
+            if self.use_sqlite_fallback or DB_TYPE not in ['postgresql', 'mysql']:
+                # 기존 SQLite 파일 마이그레이션 (upsert 갱신 시각 컬럼)
+                columns = {row[1] for row in cursor.execute("PRAGMA table_info(daily_traffic)")}
+                if 'updated_at' not in columns:
+                    cursor.execute("ALTER TABLE daily_traffic ADD COLUMN updated_at TIMESTAMP")
+            
             conn.commit()
-            conn.close()
             logger.info("Database setup complete")
             
         except Exception as e:
@@ -223,91 +406,46 @@ class OnlineDataCollector:
         
         try:
             # 올바른 CloudScraper 사용 (성공한 로직과 동일)
-            response = self.scraper.get('https://www.pokerscout.com', timeout=30)
-            response.raise_for_status()
+            # 응답을 스트리밍으로 받으면서 청크 단위로 파서에 전달 (다운로드와 파싱 병행)
+            with self.scraper.get('https://www.pokerscout.com', timeout=30, stream=True) as response:
+                response.raise_for_status()
+                
+                parser = lxml_html.HTMLParser()
+                for chunk in response.iter_content(chunk_size=65536):
+                    parser.feed(chunk)
+                doc = parser.close()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            table = soup.find('table', {'class': 'rankTable'})
+            save_scraper_session(self.scraper)
             
-            if not table:
+            # 1단계: 각 행에서 사이트명과 4개 수치 필드 문자열 추출
+            raw_rows = parse_pokerscout_rows(doc)
+            
+            if raw_rows is None:
                 logger.error("Could not find PokerScout table")
                 return []
             
-            collected_data = []
-            rows = table.find_all('tr')[1:]  # Skip header
-            logger.info(f"Found rows: {len(rows)}")
+            logger.info(f"Found rows: {len(raw_rows)}")
             
-            for i, row in enumerate(rows):
-                try:
-                    # 광고 행 건너뛰기 - 중요!
-                    if 'cus_top_traffic_coin' in row.get('class', []):
-                        logger.info(f"Row {i+1}: Skipping ad row")
-                        continue
-                    
-                    # 사이트명 추출
-                    brand_title = row.find('span', {'class': 'brand-title'})
-                    if not brand_title:
-                        continue
-                    
-                    site_name = brand_title.get_text(strip=True)
-                    if not site_name or len(site_name) < 2:
-                        continue
-                    
-                    # Players Online 추출 (성공한 로직과 정확히 동일)
-                    players_online = 0
-                    online_td = row.find('td', {'id': 'online'})
-                    if online_td:
-                        online_span = online_td.find('span')
-                        if online_span:
-                            online_text = online_span.get_text(strip=True).replace(',', '')
-                            if online_text.isdigit():
-                                players_online = int(online_text)
-                    
-                    # Cash Players 추출 (성공한 로직과 정확히 동일)
-                    cash_players = 0
-                    cash_td = row.find('td', {'id': 'cash'})
-                    if cash_td:
-                        cash_text = cash_td.get_text(strip=True).replace(',', '')
-                        if cash_text.isdigit():
-                            cash_players = int(cash_text)
-                    
-                    # 24H Peak 추출
-                    peak_24h = 0
-                    peak_td = row.find('td', {'id': 'peak'})
-                    if peak_td:
-                        peak_text = peak_td.get_text(strip=True).replace(',', '')
-                        if peak_text.isdigit():
-                            peak_24h = int(peak_text)
-                    
-                    # 7 Day Average 추출
-                    seven_day_avg = 0
-                    avg_td = row.find('td', {'id': 'avg'})
-                    if avg_td:
-                        avg_text = avg_td.get_text(strip=True).replace(',', '')
-                        if avg_text.isdigit():
-                            seven_day_avg = int(avg_text)
-                    
-                    # 사이트명 정규화
-                    site_name = self.normalize_site_name(site_name)
-                    
-                    site_data = {
-                        'site_name': site_name,
-                        'players_online': players_online,
-                        'cash_players': cash_players,
-                        'peak_24h': peak_24h,
-                        'seven_day_avg': seven_day_avg
-                    }
-                    
-                    collected_data.append(site_data)
-                    
-                    # GG POKER 사이트는 특별 표시
-                    is_gg = any(gg in site_name for gg in self.gg_poker_sites)
-                    status = "TARGET" if is_gg else "OK"
-                    logger.info(f"{status} {site_name}: {players_online:,} players (cash: {cash_players:,})")
-                    
-                except Exception as e:
-                    logger.error(f"Error parsing row {i+1}: {str(e)}")
-                    continue
+            # 2단계: 사이트명이 없거나 너무 짧은 행을 걸러내고 레코드로 변환
+            collected_data = [
+                {
+                    'site_name': self.normalize_site_name(site_name),
+                    'players_online': _parse_int(online_text),
+                    'cash_players': _parse_int(cash_text),
+                    'peak_24h': _parse_int(peak_text),
+                    'seven_day_avg': _parse_int(avg_text)
+                }
+                for site_name, online_text, cash_text, peak_text, avg_text in raw_rows
+                if len(site_name) >= 2
+            ]
+            
+            for site_data in collected_data:
+                # GG POKER 사이트는 특별 표시
+                status = "TARGET" if is_gg_poker_site(site_data['site_name']) else "OK"
+                logger.info(
+                    f"{status} {site_data['site_name']}: {site_data['players_online']:,} players "
+                    f"(cash: {site_data['cash_players']:,})"
+                )
             
             logger.info(f"Crawling complete: {len(collected_data)} sites")
             return collected_data
@@ -318,24 +456,7 @@ class OnlineDataCollector:
     
     def normalize_site_name(self, raw_name):
         """사이트명 정규화"""
-        name_mapping = {
-            'ggnetwork': 'GGNetwork',
-            'gg network': 'GGNetwork',
-            'ggpoker': 'GGNetwork',
-            'gg poker': 'GGNetwork',
-            'ggpoker on': 'GGPoker ON',
-            'pokerstars': 'PokerStars',
-            'pokerstars ontario': 'PokerStars Ontario',
-            'wpt global': 'WPT Global',
-            '888poker': '888poker',
-            'partypoker': 'partypoker',
-            'chico poker': 'Chico Poker',
-            'ipoker': 'iPoker',
-            'winamax': 'Winamax'
-        }
-        
-        normalized = raw_name.lower().strip()
-        return name_mapping.get(normalized, raw_name)
+        return SITE_NAME_MAPPING.get(raw_name.strip().lower(), raw_name)
     
     def save_data_to_online_db(self, data):
         """온라인 데이터베이스에 저장"""
@@ -347,76 +468,87 @@ class OnlineDataCollector:
             conn = self.get_db_connection()
             cursor = conn.cursor()
             
-            collection_date = datetime.now().strftime('%Y-%m-%d')
-            collection_time = datetime.now().strftime('%H:%M:%S')
+            # 날짜/시간은 한 시점에서 계산 (자정 경계에서 날짜와 시간이 어긋나지 않도록)
+            now = datetime.now()
+            collection_date = now.strftime('%Y-%m-%d')
+            collection_time = now.strftime('%H:%M:%S')
             
-            saved_count = 0
-            gg_poker_count = 0
-            total_players = 0
+            # 반복 평가하지 않도록 DB 종류 분기를 한 번만 계산
+            use_server_db = not self.use_sqlite_fallback and DB_TYPE in ('postgresql', 'mysql')
+            placeholder = '%s' if use_server_db else '?'
             
-            for site_data in data:
-                try:
-                    if not self.use_sqlite_fallback and DB_TYPE in ['postgresql', 'mysql']:
-                        sql = """
-                        INSERT INTO daily_traffic 
-                        (site_name, collection_date, collection_time, players_online, 
-                         cash_players, peak_24h, seven_day_avg)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                        ON CONFLICT (site_name, collection_date, collection_time) 
-                        DO UPDATE SET 
-                            players_online = EXCLUDED.players_online,
-                            cash_players = EXCLUDED.cash_players,
-                            peak_24h = EXCLUDED.peak_24h,
-                            seven_day_avg = EXCLUDED.seven_day_avg
-                        """
-                    else:
-                        sql = """
-                        INSERT OR REPLACE INTO daily_traffic 
-                        (site_name, collection_date, collection_time, players_online, 
-                         cash_players, peak_24h, seven_day_avg)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """
-                    
-                    cursor.execute(sql, (
-                        site_data['site_name'],
-                        collection_date,
-                        collection_time,
-                        site_data['players_online'],
-                        site_data['cash_players'],
-                        site_data['peak_24h'],
-                        site_data['seven_day_avg']
-                    ))
-                    
-                    saved_count += 1
-                    total_players += site_data['players_online']
-                    
-                    # GG POKER 사이트 카운트
-                    if any(gg in site_data['site_name'] for gg in self.gg_poker_sites):
-                        gg_poker_count += 1
-                        
-                except Exception as e:
-                    logger.error(f"Failed to save {site_data['site_name']}: {str(e)}")
+            # 정규화 후 같은 사이트명이 여러 번 나오면 마지막 행 사용
+            # (PostgreSQL은 한 문장에서 같은 키를 두 번 upsert할 수 없음)
+            latest_by_site = {site_data['site_name']: site_data for site_data in data}
             
-            # 수집 통계 저장
-            if not self.use_sqlite_fallback and DB_TYPE in ['postgresql', 'mysql']:
-                stats_sql = """
-                INSERT INTO collection_stats 
-                (collection_date, collection_time, total_sites, gg_poker_sites, total_players)
-                VALUES (%s, %s, %s, %s, %s)
-                """
+            # 한 번의 배치로 삽입 (사이트별 왕복 제거)
+            if use_server_db and DB_TYPE == 'postgresql':
+                # 트래픽 upsert와 수집 통계 삽입을 한 문장으로 전송 (왕복 1회, 한 행이라도 실패하면 전체 롤백)
+                saved_count, gg_poker_count, total_players = _collection_totals(list(latest_by_site.values()))
+                params = {
+                    'site_names': list(latest_by_site),
+                    'collection_date': collection_date,
+                    'collection_time': collection_time,
+                    'players_online': [d['players_online'] for d in latest_by_site.values()],
+                    'cash_players': [d['cash_players'] for d in latest_by_site.values()],
+                    'peak_24h': [d['peak_24h'] for d in latest_by_site.values()],
+                    'seven_day_avg': [d['seven_day_avg'] for d in latest_by_site.values()],
+                    'total_sites': saved_count,
+                    'gg_poker_sites': gg_poker_count,
+                    'total_players': total_players
+                }
+                if self._use_prepared:
+                    # 서버 측 준비 문장 재사용 (연결당 한 번만 파싱/계획)
+                    if conn not in _PREPARED_CONNECTIONS:
+                        cursor.execute(PG_SAVE_PREPARE_SQL)
+                        _PREPARED_CONNECTIONS.add(conn)
+                    cursor.execute(PG_SAVE_EXECUTE_SQL, [params[name] for name in PG_SAVE_PARAMS])
+                else:
+                    cursor.execute(PG_SAVE_SQL, params)
             else:
-                stats_sql = """
+                # 잘못된 행 하나 때문에 나머지 사이트를 잃지 않도록 행 단위로 실패를 허용
+                saved_sites = []
+                rows = []
+                for site_data in latest_by_site.values():
+                    try:
+                        rows.append((
+                            site_data['site_name'],
+                            collection_date,
+                            collection_time,
+                            site_data['players_online'],
+                            site_data['cash_players'],
+                            site_data['peak_24h'],
+                            site_data['seven_day_avg']
+                        ))
+                        saved_sites.append(site_data)
+                    except (KeyError, TypeError) as e:
+                        logger.error(f"Failed to save {site_data.get('site_name')}: {str(e)}")
+                
+                upsert_sql = (DAILY_TRAFFIC_UPSERT_SQL if use_server_db else SQLITE_DAILY_TRAFFIC_UPSERT_SQL).format(
+                    source=f"VALUES ({', '.join([placeholder] * 7)})"
+                )
+                try:
+                    cursor.executemany(upsert_sql, rows)
+                except Exception:
+                    # 배치가 중간에 실패하면 행별로 다시 실행해 문제 행만 건너뜀 (upsert라 재실행 무해)
+                    batch_sites, saved_sites = saved_sites, []
+                    for site_data, row in zip(batch_sites, rows):
+                        try:
+                            cursor.execute(upsert_sql, row)
+                            saved_sites.append(site_data)
+                        except Exception as e:
+                            logger.error(f"Failed to save {site_data['site_name']}: {str(e)}")
+                
+                saved_count, gg_poker_count, total_players = _collection_totals(saved_sites)
+                
+                # 수집 통계 저장
+                cursor.execute(f"""
                 INSERT INTO collection_stats 
                 (collection_date, collection_time, total_sites, gg_poker_sites, total_players)
-                VALUES (?, ?, ?, ?, ?)
-                """
-            
-            cursor.execute(stats_sql, (
-                collection_date, collection_time, saved_count, gg_poker_count, total_players
-            ))
+                VALUES ({', '.join([placeholder] * 5)})
+                """, (collection_date, collection_time, saved_count, gg_poker_count, total_players))
             
             conn.commit()
-            conn.close()
             
             logger.info(f"Saved to online DB:")
             logger.info(f"  Sites: {saved_count}")
@@ -427,6 +559,14 @@ class OnlineDataCollector:
             
         except Exception as e:
             logger.error(f"Failed to save to online DB: {str(e)}")
+            # 실패한 트랜잭션을 되돌려 재사용 연결을 다시 쓸 수 있게 함
+            if self._conn is not None:
+                try:
+                    self._conn.rollback()
+                except Exception as rollback_error:
+                    # 연결이 끊긴 경우 등 - 버리고 다음 호출에서 새로 연결
+                    logger.warning(f"Rollback failed, discarding connection: {str(rollback_error)}")
+                    self._discard_connection()
             return False
     
     def run_online_collection(self):
@@ -444,12 +584,15 @@ class OnlineDataCollector:
             
             # 온라인 DB 저장
             success = self.save_data_to_online_db(data)
+            end_time = datetime.now()
             
-            # 수집 리포트 생성
+            # 수집 리포트 생성 (저장에 성공한 경우만, 리포트 작성 실패가 수집 결과를 바꾸지 않도록)
             if success:
-                self.generate_collection_report(data, start_time)
+                try:
+                    self.generate_collection_report(data, start_time, end_time)
+                except Exception as e:
+                    logger.error(f"Failed to write collection report: {str(e)}")
             
-            end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
             
             logger.info(f"Online collection complete (Duration: {duration:.1f}s)")
@@ -458,10 +601,20 @@ class OnlineDataCollector:
         except Exception as e:
             logger.error(f"Online collection failed: {str(e)}")
             return False
+        
+        finally:
+            self.close()
     
-    def generate_collection_report(self, data, start_time):
-        """수집 리포트 생성"""
-        end_time = datetime.now()
+    def generate_collection_report(self, data, start_time, end_time=None):
+        """수집 리포트 생성 (end_time: 저장까지 끝난 시각, 없으면 현재 시각)"""
+        end_time = end_time or datetime.now()
+        
+        # 합계를 한 번의 순회로 계산
+        gg_poker_sites = total_players = total_cash_players = 0
+        for d in data:
+            gg_poker_sites += 'GG' in d['site_name']
+            total_players += d['players_online']
+            total_cash_players += d['cash_players']
         
         report = {
             'timestamp': end_time.isoformat(),
@@ -469,17 +622,21 @@ class OnlineDataCollector:
             'collection_end': end_time.isoformat(),
             'duration_seconds': (end_time - start_time).total_seconds(),
             'total_sites': len(data),
-            'gg_poker_sites': len([d for d in data if 'GG' in d['site_name']]),
-            'total_players': sum(d['players_online'] for d in data),
-            'total_cash_players': sum(d['cash_players'] for d in data),
+            'gg_poker_sites': gg_poker_sites,
+            'total_players': total_players,
+            'total_cash_players': total_cash_players,
             'sites_data': data,
             'success': True
         }
         
         # JSON 리포트 저장
         filename = f"collection_report_{end_time.strftime('%Y%m%d_%H%M%S')}.json"
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
         
         logger.info(f"Collection report saved: {filename}")
         return filename
@@ -10,499 +10,119 @@ import sys
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
+import os
 import json
 import sqlite3
+import hashlib
+import gzip
 from datetime import datetime, timedelta
 import re
 from collections import defaultdict
+from operator import itemgetter
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import threading
 
-class PokerDashboard:
-    def __init__(self, db_path='gg_poker_monitoring.db'):
-        self.db_path = db_path
-        self.setup_event_tracking()
-        
-    def setup_event_tracking(self):
-        """이벤트 추적을 위한 테이블 설정"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # 포커 이벤트 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS poker_events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_date DATE NOT NULL,
-                event_type TEXT NOT NULL,
-                event_title TEXT NOT NULL,
-                affected_sites TEXT,
-                event_description TEXT,
-                news_source TEXT,
-                news_url TEXT,
-                impact_level TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-        
-    def detect_news_events(self, news_data):
-        """뉴스에서 대회/이벤트 자동 감지"""
-        tournament_keywords = [
-            'WSOP', 'SCOOP', 'WCOOP', 'EPT', 'WPT', 'MILLIONS', 
-            'Championship', 'Festival', 'Series', 'Tournament',
-            'Satellite', 'Qualifier', 'Final Table', 'Main Event'
-        ]
-        
-        promo_keywords = [
-            'Promotion', 'Bonus', 'Freeroll', 'Jackpot', 'Leaderboard',
-            'Rake Race', 'Cashback', 'Deposit', 'Welcome'
-        ]
-        
-        site_keywords = {
-            'PokerStars': ['PokerStars', 'pokerstars'],
-            'GGNetwork': ['GGPoker', 'GG Poker', 'GGNetwork', 'GG Network'],
-            'WPT Global': ['WPT Global', 'WPT'],
-            '888poker': ['888poker', '888'],
-            'partypoker': ['partypoker', 'party poker']
-        }
-        
-        detected_events = []
-        
-        for news in news_data:
-            title = news.get('title', '')
-            content = news.get('content', '')
-            date = news.get('date', datetime.now().strftime('%Y-%m-%d'))
-            url = news.get('url', '')
-            
-            # 이벤트 타입 감지
-            event_type = None
-            impact_level = 'LOW'
-            
-            title_lower = title.lower()
-            content_lower = content.lower()
-            full_text = f"{title_lower} {content_lower}"
-            
-            # 토너먼트 감지
-            for keyword in tournament_keywords:
-                if keyword.lower() in full_text:
-                    event_type = 'TOURNAMENT'
-                    if keyword in ['WSOP', 'SCOOP', 'WCOOP', 'EPT']:
-                        impact_level = 'HIGH'
-                    elif keyword in ['Championship', 'Main Event']:
-                        impact_level = 'MEDIUM'
-                    break
-            
-            # 프로모션 감지
-            if not event_type:
-                for keyword in promo_keywords:
-                    if keyword.lower() in full_text:
-                        event_type = 'PROMOTION'
-                        impact_level = 'MEDIUM'
-                        break
-            
-            # 사이트 연관성 감지
-            affected_sites = []
-            for site, keywords in site_keywords.items():
-                for keyword in keywords:
-                    if keyword.lower() in full_text:
-                        affected_sites.append(site)
-                        break
-            
-            if event_type and affected_sites:
-                detected_events.append({
-                    'event_date': date,
-                    'event_type': event_type,
-                    'event_title': title,
-                    'affected_sites': ','.join(affected_sites),
-                    'event_description': content[:200] + '...' if len(content) > 200 else content,
-                    'news_source': 'PokerNews',
-                    'news_url': url,
-                    'impact_level': impact_level
-                })
-        
-        return detected_events
-    
-    def save_events(self, events):
-        """이벤트를 데이터베이스에 저장"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for event in events:
-            cursor.execute('''
-                INSERT OR REPLACE INTO poker_events 
-                (event_date, event_type, event_title, affected_sites, 
-                 event_description, news_source, news_url, impact_level)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                event['event_date'],
-                event['event_type'],
-                event['event_title'],
-                event['affected_sites'],
-                event['event_description'],
-                event['news_source'],
-                event['news_url'],
-                event['impact_level']
-            ))
-        
-        conn.commit()
-        conn.close()
-        
-    def generate_multi_line_chart(self, days_back=30):
-        """탭 1: 멀티 라인 차트 (트렌드 분석)"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # 날짜별 데이터 조회
-        query = '''
-            SELECT 
-                collection_date,
-                site_name,
-                players_online,
-                cash_players,
-                peak_24h,
-                seven_day_avg
-            FROM daily_traffic 
-            WHERE collection_date >= date('now', '-' || ? || ' days')
-            ORDER BY collection_date, site_name
-        '''
-        
-        cursor.execute(query, (days_back,))
-        results = cursor.fetchall()
-        
-        # 이벤트 데이터 조회
-        cursor.execute('''
-            SELECT event_date, event_title, event_type, affected_sites, impact_level
-            FROM poker_events 
-            WHERE event_date >= date('now', '-' || ? || ' days')
-            ORDER BY event_date
-        ''', (days_back,))
-        events = cursor.fetchall()
-        
-        # 차트 데이터 구성
-        chart_data = {
-            'chart_type': 'multi_line',
-            'title': '포커 사이트 트렌드 분석',
-            'dates': [],
-            'sites': {},
-            'events': [],
-            'metrics': ['players_online', 'cash_players', 'peak_24h', 'seven_day_avg']
-        }
-        
-        # 데이터 정리
-        data_by_date = defaultdict(dict)
-        for row in results:
-            date, site, players, cash, peak, avg = row
-            if date not in chart_data['dates']:
-                chart_data['dates'].append(date)
-            
-            if site not in chart_data['sites']:
-                chart_data['sites'][site] = {
-                    'players_online': [],
-                    'cash_players': [],
-                    'peak_24h': [],
-                    'seven_day_avg': []
-                }
-            
-            data_by_date[date][site] = {
-                'players_online': players or 0,
-                'cash_players': cash or 0,
-                'peak_24h': peak or 0,
-                'seven_day_avg': avg or 0
-            }
-        
-        # 날짜별로 모든 사이트 데이터 정렬
-        chart_data['dates'].sort()
-        for date in chart_data['dates']:
-            for site in chart_data['sites']:
-                site_data = data_by_date[date].get(site, {})
-                for metric in chart_data['metrics']:
-                    chart_data['sites'][site][metric].append(site_data.get(metric, 0))
-        
-        # 이벤트 데이터 추가
-        for event in events:
-            event_date, title, event_type, affected_sites, impact = event
-            chart_data['events'].append({
-                'date': event_date,
-                'title': title,
-                'type': event_type,
-                'sites': affected_sites.split(',') if affected_sites else [],
-                'impact': impact,
-                'color': self.get_event_color(event_type, impact)
-            })
-        
-        conn.close()
-        return chart_data
-    
-    def generate_radar_chart(self):
-        """탭 2: 레이더 차트 (현재 상태 비교)"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # 최근 데이터 조회
-        query = '''
-            SELECT 
-                site_name,
-                players_online,
-                cash_players,
-                peak_24h,
-                seven_day_avg
-            FROM daily_traffic 
-            WHERE collection_date = (SELECT MAX(collection_date) FROM daily_traffic)
-            ORDER BY players_online DESC
-        '''
-        
-        cursor.execute(query)
-        results = cursor.fetchall()
-        
-        # 정규화를 위한 최대값 계산
-        max_values = {
-            'players_online': 0,
-            'cash_players': 0,
-            'peak_24h': 0,
-            'seven_day_avg': 0
-        }
-        
-        for row in results:
-            max_values['players_online'] = max(max_values['players_online'], row[1] or 0)
-            max_values['cash_players'] = max(max_values['cash_players'], row[2] or 0)
-            max_values['peak_24h'] = max(max_values['peak_24h'], row[3] or 0)
-            max_values['seven_day_avg'] = max(max_values['seven_day_avg'], row[4] or 0)
-        
-        chart_data = {
-            'chart_type': 'radar',
-            'title': '포커 사이트 현재 상태 비교',
-            'metrics': ['Players Online', 'Cash Players', '24h Peak', '7-day Average'],
-            'sites': [],
-            'max_values': max_values
-        }
-        
-        for row in results:
-            site_name, players, cash, peak, avg = row
-            
-            # 0-100 스케일로 정규화
-            normalized_data = [
-                (players / max_values['players_online'] * 100) if max_values['players_online'] > 0 else 0,
-                (cash / max_values['cash_players'] * 100) if max_values['cash_players'] > 0 else 0,
-                (peak / max_values['peak_24h'] * 100) if max_values['peak_24h'] > 0 else 0,
-                (avg / max_values['seven_day_avg'] * 100) if max_values['seven_day_avg'] > 0 else 0
-            ]
-            
-            chart_data['sites'].append({
-                'name': site_name,
-                'data': normalized_data,
-                'raw_data': [players or 0, cash or 0, peak or 0, avg or 0]
-            })
-        
-        conn.close()
-        return chart_data
+try:
+    import orjson
+except ImportError:  # orjson 미설치 시 표준 json 사용
+    orjson = None
+
+# 뉴스 이벤트 감지 키워드
+# 토너먼트는 (키워드, 임팩트) - 여러 개가 걸리면 앞쪽(임팩트가 큰) 키워드 우선
+TOURNAMENT_KEYWORDS = (
+    ('WSOP', 'HIGH'), ('SCOOP', 'HIGH'), ('WCOOP', 'HIGH'), ('EPT', 'HIGH'),
+    ('Championship', 'MEDIUM'), ('Main Event', 'MEDIUM'),
+    ('WPT', 'LOW'), ('MILLIONS', 'LOW'), ('Festival', 'LOW'), ('Series', 'LOW'),
+    ('Tournament', 'LOW'), ('Satellite', 'LOW'), ('Qualifier', 'LOW'), ('Final Table', 'LOW')
+)
+
+PROMO_KEYWORDS = (
+    'Promotion', 'Bonus', 'Freeroll', 'Jackpot', 'Leaderboard',
+    'Rake Race', 'Cashback', 'Deposit', 'Welcome'
+)
+
+SITE_KEYWORDS = {
+    'PokerStars': ('PokerStars', 'pokerstars'),
+    'GGNetwork': ('GGPoker', 'GG Poker', 'GGNetwork', 'GG Network'),
+    'WPT Global': ('WPT Global', 'WPT'),
+    '888poker': ('888poker', '888'),
+    'partypoker': ('partypoker', 'party poker')
+}
+
+# 모듈 로드 시 한 번만 소문자화
+_TOURNAMENT_KW_LOWER = tuple((k.lower(), impact) for k, impact in TOURNAMENT_KEYWORDS)
+_PROMO_KW_LOWER = tuple(k.lower() for k in PROMO_KEYWORDS)
+_SITE_KW_LOWER = tuple((k.lower(), site) for site, keywords in SITE_KEYWORDS.items() for k in keywords)
+_SITE_ORDER = tuple(SITE_KEYWORDS)
+
+def _build_keyword_matcher():
+    """토너먼트/프로모션/사이트 키워드를 기사당 한 번의 스캔으로 찾는 매처 구성"""
+    # 소문자 키워드 -> [(분류, 값)] (토너먼트는 목록 순서를 우선순위로 사용)
+    keyword_meta = defaultdict(list)
+    for rank, (keyword, impact_level) in enumerate(_TOURNAMENT_KW_LOWER):
+        keyword_meta[keyword].append(('TOURNAMENT', (rank, impact_level)))
     
-    def generate_heatmap_chart(self, days_back=30):
-        """탭 3: 히트맵 (변화 감지)"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # 일별 변화율 계산
-        query = '''
-            WITH daily_data AS (
-                SELECT 
-                    site_name,
-                    collection_date,
-                    players_online,
-                    LAG(players_online) OVER (PARTITION BY site_name ORDER BY collection_date) as prev_players
-                FROM daily_traffic 
-                WHERE collection_date >= date('now', '-' || ? || ' days')
-                ORDER BY site_name, collection_date
-            )
-            SELECT 
-                site_name,
-                collection_date,
-                players_online,
-                prev_players,
-                CASE 
-                    WHEN prev_players > 0 THEN 
-                        ROUND(((players_online - prev_players) * 100.0 / prev_players), 2)
-                    ELSE 0 
-                END as change_pct
-            FROM daily_data
-            WHERE prev_players IS NOT NULL
-        '''
-        
-        cursor.execute(query, (days_back,))
-        results = cursor.fetchall()
-        
-        chart_data = {
-            'chart_type': 'heatmap',
-            'title': '포커 사이트 일별 변화율 히트맵',
-            'dates': [],
-            'sites': [],
-            'data': []
-        }
-        
-        # 데이터 정리
-        heatmap_data = {}
-        dates_set = set()
-        sites_set = set()
-        
-        for row in results:
-            site, date, players, prev_players, change_pct = row
-            dates_set.add(date)
-            sites_set.add(site)
-            
-            if site not in heatmap_data:
-                heatmap_data[site] = {}
-            heatmap_data[site][date] = change_pct
-        
-        chart_data['dates'] = sorted(list(dates_set))
-        chart_data['sites'] = sorted(list(sites_set))
-        
-        # 히트맵 매트릭스 생성
-        for site in chart_data['sites']:
-            site_row = []
-            for date in chart_data['dates']:
-                change_pct = heatmap_data.get(site, {}).get(date, 0)
-                site_row.append(change_pct)
-            chart_data['data'].append(site_row)
-        
-        conn.close()
-        return chart_data
+    for keyword in _PROMO_KW_LOWER:
+        keyword_meta[keyword].append(('PROMOTION', None))
     
-    def generate_bubble_chart(self):
-        """탭 4: 버블 차트 (4차원 분석)"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        query = '''
-            SELECT 
-                site_name,
-                collection_date,
-                players_online,
-                cash_players,
-                peak_24h,
-                seven_day_avg
-            FROM daily_traffic 
-            WHERE collection_date >= date('now', '-7 days')
-            ORDER BY collection_date DESC
-        '''
-        
-        cursor.execute(query)
-        results = cursor.fetchall()
-        
-        chart_data = {
-            'chart_type': 'bubble',
-            'title': '포커 사이트 4차원 분석 (최근 7일)',
-            'datasets': []
-        }
-        
-        # 사이트별 데이터 그룹화
-        site_data = defaultdict(list)
-        for row in results:
-            site, date, players, cash, peak, avg = row
-            site_data[site].append({
-                'date': date,
-                'x': players or 0,  # X축: Players Online
-                'y': cash or 0,     # Y축: Cash Players
-                'r': (peak or 0) / 1000,  # 버블 크기: 24h Peak (스케일 조정)
-                'avg': avg or 0     # 색상: 7-day Average
-            })
-        
-        # 사이트별 데이터셋 생성
-        colors = ['#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF', '#FF9F40']
-        for i, (site, data) in enumerate(site_data.items()):
-            chart_data['datasets'].append({
-                'label': site,
-                'data': data,
-                'backgroundColor': colors[i % len(colors)],
-                'borderColor': colors[i % len(colors)]
-            })
-        
-        conn.close()
-        return chart_data
+    for keyword, site in _SITE_KW_LOWER:
+        keyword_meta[keyword].append(('SITE', site))
     
-    def generate_stacked_bar_chart(self, days_back=30):
-        """탭 5: 스택 바 차트 (시장 점유율)"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        query = '''
-            SELECT 
-                collection_date,
-                site_name,
-                players_online
-            FROM daily_traffic 
-            WHERE collection_date >= date('now', '-' || ? || ' days')
-            AND players_online > 0
-            ORDER BY collection_date, players_online DESC
-        '''
-        
-        cursor.execute(query, (days_back,))
-        results = cursor.fetchall()
-        
-        chart_data = {
-            'chart_type': 'stacked_bar',
-            'title': '포커 사이트 시장 점유율 추이',
-            'dates': [],
-            'sites': set(),
-            'datasets': []
-        }
-        
-        # 데이터 정리
-        data_by_date = defaultdict(dict)
-        for row in results:
-            date, site, players = row
-            data_by_date[date][site] = players
-            chart_data['sites'].add(site)
-        
-        chart_data['dates'] = sorted(data_by_date.keys())
-        chart_data['sites'] = sorted(list(chart_data['sites']))
-        
-        # 각 사이트별 데이터셋 생성
-        colors = ['#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF', '#FF9F40', '#FF6384', '#C9CBCF']
-        
-        for i, site in enumerate(chart_data['sites']):
-            site_data = []
-            for date in chart_data['dates']:
-                players = data_by_date[date].get(site, 0)
-                site_data.append(players)
-            
-            chart_data['datasets'].append({
-                'label': site,
-                'data': site_data,
-                'backgroundColor': colors[i % len(colors)],
-                'borderColor': colors[i % len(colors)],
-                'borderWidth': 1
-            })
-        
-        conn.close()
-        return chart_data
+    # 다른 키워드를 단어로 품은 키워드('wpt global' -> 'wpt')는 포함된 키워드 정보도 함께 보유
+    meta = {
+        keyword: tuple(
+            entry for other, entries in keyword_meta.items()
+            if re.search(rf'\b{re.escape(other)}\b', keyword) for entry in entries
+        )
+        for keyword in keyword_meta
+    }
     
-    def get_event_color(self, event_type, impact_level):
-        """이벤트 타입과 임팩트에 따른 색상 반환"""
-        color_map = {
-            ('TOURNAMENT', 'HIGH'): '#FF0000',    # 빨강 - 주요 토너먼트
-            ('TOURNAMENT', 'MEDIUM'): '#FF6600',  # 주황 - 중간 토너먼트
-            ('TOURNAMENT', 'LOW'): '#FFCC00',     # 노랑 - 일반 토너먼트
-            ('PROMOTION', 'HIGH'): '#0066FF',     # 파랑 - 주요 프로모션
-            ('PROMOTION', 'MEDIUM'): '#6699FF',   # 연파랑 - 중간 프로모션
-            ('PROMOTION', 'LOW'): '#99CCFF',      # 연한파랑 - 일반 프로모션
-            ('NEWS', 'HIGH'): '#FF00FF',          # 자주 - 주요 뉴스
-            ('NEWS', 'MEDIUM'): '#FF66FF',        # 연자주 - 일반 뉴스
-            ('NEWS', 'LOW'): '#FFCCFF'            # 연한자주 - 기타 뉴스
-        }
-        
-        return color_map.get((event_type, impact_level), '#CCCCCC')
+    # 위치마다 가장 긴 키워드를 찾는 lookahead 패턴 - 단어 단위로 대소문자 무시 매칭
+    # ('except' 안의 'ept'처럼 단어 일부에 걸린 오탐 방지, 본문 소문자 변환 불필요)
+    alternation = '|'.join(re.escape(k) for k in sorted(keyword_meta, key=len, reverse=True))
+    return meta, re.compile(rf'(?=\b({alternation})\b)', re.IGNORECASE)
+
+KEYWORD_META, KEYWORD_PATTERN = _build_keyword_matcher()
+
+def _cutoff_date(days_back):
+    """N일 전 날짜 문자열 (SQLite date('now', '-N days')와 같은 UTC 기준)"""
+    return (datetime.utcnow().date() - timedelta(days=days_back)).isoformat()
+
+def _trunc(text, limit=200):
+    """limit자를 넘는 문자열은 '...' 포함 limit자로 자름"""
+    return text if len(text) <= limit else text[:limit - 3] + '...'
+
+def _pivot(rows, dates, sites, columns):
+    """(날짜, 사이트, 값...) 행을 지표별 {사이트: 날짜순 값 목록}으로 피벗
     
-    def generate_dashboard_html(self, output_file='poker_dashboard.html'):
-        """HTML 대시보드 생성"""
-        # 모든 차트 데이터 생성
-        charts = {
-            'multi_line': self.generate_multi_line_chart(),
-            'radar': self.generate_radar_chart(),
-            'heatmap': self.generate_heatmap_chart(),
-            'bubble': self.generate_bubble_chart(),
-            'stacked_bar': self.generate_stacked_bar_chart()
-        }
-        
-        html_template = '''
+    columns는 {지표명: 행 내 위치}, 같은 칸의 행이 여럿이면 마지막 행 사용, 빈 칸/NULL은 0
+    """
+    # 사이트별 배열을 0으로 미리 할당하고 행을 한 번 훑으며 날짜 위치에 기록
+    date_index = {date: i for i, date in enumerate(dates)}
+    pivots = {name: {site: [0] * len(dates) for site in sites} for name in columns}
+    for row in rows:
+        i = date_index[row[0]]
+        for name, index in columns.items():
+            pivots[name][row[1]][i] = row[index] or 0
+    return pivots
+
+# 이벤트 (타입, 임팩트)별 차트 표시 색상
+_EVENT_COLOR_MAP = {
+    ('TOURNAMENT', 'HIGH'): '#FF0000',    # 빨강 - 주요 토너먼트
+    ('TOURNAMENT', 'MEDIUM'): '#FF6600',  # 주황 - 중간 토너먼트
+    ('TOURNAMENT', 'LOW'): '#FFCC00',     # 노랑 - 일반 토너먼트
+    ('PROMOTION', 'HIGH'): '#0066FF',     # 파랑 - 주요 프로모션
+    ('PROMOTION', 'MEDIUM'): '#6699FF',   # 연파랑 - 중간 프로모션
+    ('PROMOTION', 'LOW'): '#99CCFF',      # 연한파랑 - 일반 프로모션
+    ('NEWS', 'HIGH'): '#FF00FF',          # 자주 - 주요 뉴스
+    ('NEWS', 'MEDIUM'): '#FF66FF',        # 연자주 - 일반 뉴스
+    ('NEWS', 'LOW'): '#FFCCFF'            # 연한자주 - 기타 뉴스
+}
+
+# 대시보드 HTML 템플릿 (차트 데이터 JSON 앞/뒤)
+_HTML_PRE = '''
 <!DOCTYPE html>
 <html lang="ko">
 <head>
@@ -576,7 +196,9 @@ class PokerDashboard:
     </div>
 
     <script>
-        const chartData = ''' + json.dumps(charts, ensure_ascii=False) + ''';
+        const chartData = '''
+
+_HTML_POST = ''';
         
         let charts = {};
         
@@ -760,50 +382,544 @@ class PokerDashboard:
 </body>
 </html>
         '''
+
+# 대시보드 코드/템플릿 버전 - 이 파일이 바뀌면 데이터가 같아도 HTML을 다시 생성
+_DASHBOARD_VERSION = hashlib.blake2b(Path(__file__).read_bytes(), digest_size=16).digest()
+
+class PokerDashboard:
+    def __init__(self, db_path='gg_poker_monitoring.db'):
+        self.db_path = db_path
+        # 차트 생성기와 이벤트 저장이 공유하는 연결 (autocommit, 쓰기 트랜잭션은 명시적으로 시작)
+        self._conn = sqlite3.connect(db_path, isolation_level=None)
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._owner_thread = threading.get_ident()
+        # 차트 병렬 생성 시 워커 스레드별 읽기 전용 연결
+        self._local = threading.local()
+        self._readers = []
+        self.setup_event_tracking()
+    
+    def close(self):
+        """공유 DB 연결 종료"""
+        self._close_readers()
+        self._conn.close()
+    
+    def _cursor(self):
+        """현재 스레드용 커서 (생성 스레드는 공유 연결, 워커 스레드는 스레드별 읽기 전용 연결)"""
+        if threading.get_ident() == self._owner_thread:
+            return self._conn.cursor()
+        
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            uri = Path(self.db_path).resolve().as_uri() + '?mode=ro'
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self._local.conn = conn
+            self._readers.append(conn)
+        return conn.cursor()
+    
+    def _close_readers(self):
+        """워커 스레드용 읽기 전용 연결 정리"""
+        while self._readers:
+            self._readers.pop().close()
+        
+    def setup_event_tracking(self):
+        """이벤트 추적을 위한 테이블 설정"""
+        cursor = self._conn.cursor()
+        
+        # WAL 모드: 저장 중에도 차트 조회가 막히지 않고 커밋당 fsync 감소
+        cursor.execute('PRAGMA journal_mode=WAL')
+        
+        # 포커 이벤트 테이블
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS poker_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_date DATE NOT NULL,
+                event_type TEXT NOT NULL,
+                event_title TEXT NOT NULL,
+                affected_sites TEXT,
+                event_description TEXT,
+                news_source TEXT,
+                news_url TEXT,
+                impact_level TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # 같은 기사(날짜, URL, 제목)는 한 행만 유지 - INSERT OR REPLACE가 기존 행을 덮어쓰도록 유니크 인덱스
+        # (이벤트 날짜 범위 조회도 이 인덱스로 처리, 인덱스 도입 전에 쌓인 중복은 최신 행만 남김)
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_poker_events_unique'")
+        if not cursor.fetchone():
+            with self._conn:
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.execute('''
+                    DELETE FROM poker_events
+                    WHERE id NOT IN (
+                        SELECT MAX(id) FROM poker_events
+                        GROUP BY event_date, news_url, event_title
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_poker_events_unique
+                    ON poker_events (event_date, news_url, event_title)
+                ''')
+                cursor.execute('DROP INDEX IF EXISTS idx_poker_events_date')
+        
+        # 트래픽 날짜 범위 조회용 인덱스 (수집기가 만드는 것과 같은 정의, 테이블이 있을 때만)
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_traffic'")
+        if cursor.fetchone():
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_daily_traffic_date_site
+                ON daily_traffic (collection_date, site_name)
+            ''')
+        
+    def detect_news_events(self, news_data):
+        """뉴스에서 대회/이벤트 자동 감지"""
+        detected_events = []
+        seen_articles = set()
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_template)
+        for news in news_data:
+            title = news.get('title', '')
+            content = news.get('content', '')
+            date = news.get('date', datetime.now().strftime('%Y-%m-%d'))
+            url = news.get('url', '')
             
-        return output_file
-
-def main():
-    """샘플 실행"""
-    print("🎯 포커 대시보드 생성...")
+            # 같은 배치 안에서 반복된 기사는 한 번만 분석
+            article_key = (date, url, title)
+            if article_key in seen_articles:
+                continue
+            seen_articles.add(article_key)
+            
+            # 이벤트 타입 감지
+            event_type = None
+            impact_level = 'LOW'
+            
+            full_text = f"{title} {content}"
+            
+            # 모든 키워드를 한 번의 스캔으로 매칭
+            tournament_hit = None
+            promo_hit = False
+            matched_sites = set()
+            for match in KEYWORD_PATTERN.finditer(full_text):
+                for category, value in KEYWORD_META[match.group(1).lower()]:
+                    if category == 'TOURNAMENT':
+                        if tournament_hit is None or value < tournament_hit:
+                            tournament_hit = value
+                    elif category == 'PROMOTION':
+                        promo_hit = True
+                    else:
+                        matched_sites.add(value)
+            
+            # 토너먼트 감지 (임팩트가 가장 큰 키워드 기준)
+            if tournament_hit:
+                event_type = 'TOURNAMENT'
+                impact_level = tournament_hit[1]
+            # 프로모션 감지
+            elif promo_hit:
+                event_type = 'PROMOTION'
+                impact_level = 'MEDIUM'
+            
+            # 사이트 연관성 감지
+            affected_sites = [site for site in _SITE_ORDER if site in matched_sites]
+            
+            if event_type and affected_sites:
+                detected_events.append({
+                    'event_date': date,
+                    'event_type': event_type,
+                    'event_title': title,
+                    'affected_sites': ','.join(affected_sites),
+                    'event_description': _trunc(content),
+                    'news_source': 'PokerNews',
+                    'news_url': url,
+                    'impact_level': impact_level
+                })
+        
+        return detected_events
+    
+    def save_events(self, events):
+        """이벤트를 데이터베이스에 저장"""
+        # 같은 (날짜, URL, 제목) 이벤트는 마지막 것만 저장
+        unique_events = {
+            (event['event_date'], event['news_url'], event['event_title']): event
+            for event in events
+        }
+        rows = [(
+            event['event_date'],
+            event['event_type'],
+            event['event_title'],
+            event['affected_sites'],
+            event['event_description'],
+            event['news_source'],
+            event['news_url'],
+            event['impact_level']
+        ) for event in unique_events.values()]
+        
+        cursor = self._conn.cursor()
+        
+        # 전체 배치를 하나의 쓰기 트랜잭션으로 저장 (오류 시 롤백)
+        with self._conn:
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.executemany('''
+                INSERT OR REPLACE INTO poker_events 
+                (event_date, event_type, event_title, affected_sites, 
+                 event_description, news_source, news_url, impact_level)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+        
+    def _load_traffic(self, days_back=30):
+        """최근 N일 트래픽 조회 - 여러 차트가 한 번의 스캔 결과를 공유"""
+        cursor = self._cursor()
+        
+        # 같은 날 여러 번 수집된 경우 마지막 수집분이 뒤에 오도록 정렬
+        cursor.execute('''
+            SELECT 
+                collection_date,
+                site_name,
+                players_online,
+                cash_players,
+                peak_24h,
+                seven_day_avg
+            FROM daily_traffic 
+            WHERE collection_date >= ?
+            ORDER BY collection_date, site_name, collection_time
+        ''', (_cutoff_date(days_back),))
+        return cursor.fetchall()
+    
+    def generate_multi_line_chart(self, days_back=30, traffic=None):
+        """탭 1: 멀티 라인 차트 (트렌드 분석)"""
+        cursor = self._cursor()
+        
+        # 날짜별 데이터 조회
+        results = traffic if traffic is not None else self._load_traffic(days_back)
+        
+        # 이벤트 데이터 조회
+        cursor.execute('''
+            SELECT event_date, event_title, event_type, affected_sites, impact_level
+            FROM poker_events 
+            WHERE event_date >= ?
+            ORDER BY event_date
+        ''', (_cutoff_date(days_back),))
+        events = cursor.fetchall()
+        
+        # 차트 데이터 구성
+        chart_data = {
+            'chart_type': 'multi_line',
+            'title': '포커 사이트 트렌드 분석',
+            'dates': [],
+            'sites': {},
+            'events': [],
+            'metrics': ['players_online', 'cash_players', 'peak_24h', 'seven_day_avg']
+        }
+        
+        # 날짜/사이트 축 (집합으로 모아 한 번 정렬)
+        chart_data['dates'] = sorted({row[0] for row in results})
+        sites = sorted({row[1] for row in results})
+        
+        # 날짜 x 사이트 피벗으로 지표별 시계열 구성
+        pivots = _pivot(results, chart_data['dates'], sites, {
+            metric: index for index, metric in enumerate(chart_data['metrics'], 2)
+        })
+        chart_data['sites'] = {
+            site: {metric: pivots[metric][site] for metric in chart_data['metrics']}
+            for site in sites
+        }
+        
+        # 이벤트 데이터 추가
+        for event in events:
+            event_date, title, event_type, affected_sites, impact = event
+            chart_data['events'].append({
+                'date': event_date,
+                'title': title,
+                'type': event_type,
+                'sites': affected_sites.split(',') if affected_sites else [],
+                'impact': impact,
+                'color': self.get_event_color(event_type, impact)
+            })
+        
+        return chart_data
+    
+    def generate_radar_chart(self):
+        """탭 2: 레이더 차트 (현재 상태 비교)"""
+        cursor = self._cursor()
+        
+        # 최근 데이터 조회
+        query = '''
+            SELECT 
+                site_name,
+                players_online,
+                cash_players,
+                peak_24h,
+                seven_day_avg
+            FROM daily_traffic 
+            WHERE collection_date = (SELECT MAX(collection_date) FROM daily_traffic)
+            ORDER BY players_online DESC, site_name
+        '''
+        
+        cursor.execute(query)
+        results = cursor.fetchall()
+        
+        # 사이트 x 지표 값 행렬 (NULL은 0)
+        raw_rows = [[value or 0 for value in row[1:]] for row in results]
+        
+        # 정규화를 위한 최대값 계산 (지표 열마다 max 한 번)
+        columns = list(zip(*raw_rows)) or [()] * 4
+        max_values = dict(zip(
+            ('players_online', 'cash_players', 'peak_24h', 'seven_day_avg'),
+            (max(column, default=0) for column in columns)
+        ))
+        column_max = list(max_values.values())
+        
+        chart_data = {
+            'chart_type': 'radar',
+            'title': '포커 사이트 현재 상태 비교',
+            'metrics': ['Players Online', 'Cash Players', '24h Peak', '7-day Average'],
+            'sites': [],
+            'max_values': max_values
+        }
+        
+        for row, raw_data in zip(results, raw_rows):
+            # 0-100 스케일로 정규화
+            normalized_data = [
+                (value / peak * 100) if peak > 0 else 0
+                for value, peak in zip(raw_data, column_max)
+            ]
+            
+            chart_data['sites'].append({
+                'name': row[0],
+                'data': normalized_data,
+                'raw_data': raw_data
+            })
+        
+        return chart_data
+    
+    def generate_heatmap_chart(self, days_back=30, traffic=None):
+        """탭 3: 히트맵 (변화 감지)"""
+        results = traffic if traffic is not None else self._load_traffic(days_back)
+        
+        chart_data = {
+            'chart_type': 'heatmap',
+            'title': '포커 사이트 일별 변화율 히트맵',
+            'dates': [],
+            'sites': [],
+            'data': []
+        }
+        
+        # 일별 변화율 계산 - 행이 날짜/수집시각 순이므로 사이트별 직전 값과 비교
+        changes = []
+        prev_by_site = {}
+        for row in results:
+            date, site, players = row[:3]
+            prev_players = prev_by_site.get(site)
+            prev_by_site[site] = players
+            if prev_players is None:
+                continue
+            change_pct = round((players - prev_players) * 100.0 / prev_players, 2) if prev_players > 0 else 0
+            changes.append((site, date, change_pct))
+        
+        # 사이트/날짜 축과 위치 인덱스
+        chart_data['dates'] = sorted({change[1] for change in changes})
+        chart_data['sites'] = sorted({change[0] for change in changes})
+        date_index = {date: i for i, date in enumerate(chart_data['dates'])}
+        site_index = {site: i for i, site in enumerate(chart_data['sites'])}
+        
+        # 히트맵 매트릭스 생성 - 0으로 채운 행렬에 위치 지정으로 기록
+        matrix = [[0] * len(chart_data['dates']) for _ in chart_data['sites']]
+        for site, date, change_pct in changes:
+            matrix[site_index[site]][date_index[date]] = change_pct
+        chart_data['data'] = matrix
+        
+        return chart_data
     
-    dashboard = PokerDashboard()
+    def generate_bubble_chart(self, traffic=None):
+        """탭 4: 버블 차트 (4차원 분석)"""
+        if traffic is None:
+            traffic = self._load_traffic(7)
+        
+        # 최근 7일만 최신 날짜부터
+        cutoff = _cutoff_date(7)
+        results = sorted((row for row in traffic if row[0] >= cutoff), key=itemgetter(0), reverse=True)
+        
+        chart_data = {
+            'chart_type': 'bubble',
+            'title': '포커 사이트 4차원 분석 (최근 7일)',
+            'datasets': []
+        }
+        
+        # 사이트별 데이터 그룹화
+        site_data = defaultdict(list)
+        for row in results:
+            date, site, players, cash, peak, avg = row
+            site_data[site].append({
+                'date': date,
+                'x': players or 0,  # X축: Players Online
+                'y': cash or 0,     # Y축: Cash Players
+                'r': (peak or 0) / 1000,  # 버블 크기: 24h Peak (스케일 조정)
+                'avg': avg or 0     # 색상: 7-day Average
+            })
+        
+        # 사이트별 데이터셋 생성
+        colors = ['#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF', '#FF9F40']
+        for i, (site, data) in enumerate(site_data.items()):
+            chart_data['datasets'].append({
+                'label': site,
+                'data': data,
+                'backgroundColor': colors[i % len(colors)],
+                'borderColor': colors[i % len(colors)]
+            })
+        
+        return chart_data
     
-    # 샘플 뉴스 이벤트 생성
-    sample_news = [
-        {
-            'title': 'PokerStars SCOOP 2024 Main Event Final Table',
-            'content': 'The biggest online poker tournament series continues with massive guarantees',
-            'date': '2024-07-15',
-            'url': 'https://pokernews.com/news/2024/07/pokerstars-scoop-main-event.htm'
-        },
-        {
-            'title': 'GGPoker WSOP Satellite Promotion',
-            'content': 'Win your seat to the World Series of Poker with special satellite tournaments',
-            'date': '2024-07-18',
-            'url': 'https://pokernews.com/news/2024/07/ggpoker-wsop-satellite.htm'
-        },
-        {
-            'title': 'WPT Global Summer Festival',
-            'content': 'Massive tournament series with over $50M guaranteed across all events',
-            'date': '2024-07-10',
-            'url': 'https://pokernews.com/news/2024/07/wpt-global-summer.htm'
+    def generate_stacked_bar_chart(self, days_back=30, traffic=None):
+        """탭 5: 스택 바 차트 (시장 점유율)"""
+        results = traffic if traffic is not None else self._load_traffic(days_back)
+        
+        chart_data = {
+            'chart_type': 'stacked_bar',
+            'title': '포커 사이트 시장 점유율 추이',
+            'dates': [],
+            'sites': [],
+            'datasets': []
         }
-    ]
+        
+        # 데이터 정리 (접속자가 있는 행만)
+        positive = [row for row in results if row[2] > 0]
+        chart_data['dates'] = sorted({row[0] for row in positive})
+        chart_data['sites'] = sorted({row[1] for row in positive})
+        players_by_site = _pivot(positive, chart_data['dates'], chart_data['sites'], {'players_online': 2})['players_online']
+        
+        # 각 사이트별 데이터셋 생성
+        colors = ['#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF', '#FF9F40', '#FF6384', '#C9CBCF']
+        
+        for i, site in enumerate(chart_data['sites']):
+            chart_data['datasets'].append({
+                'label': site,
+                'data': players_by_site[site],
+                'backgroundColor': colors[i % len(colors)],
+                'borderColor': colors[i % len(colors)],
+                'borderWidth': 1
+            })
+        
+        return chart_data
     
-    # 이벤트 감지 및 저장
-    events = dashboard.detect_news_events(sample_news)
-    dashboard.save_events(events)
+    def get_event_color(self, event_type, impact_level):
+        """이벤트 타입과 임팩트에 따른 색상 반환"""
+        return _EVENT_COLOR_MAP.get((event_type, impact_level), '#CCCCCC')
     
-    print(f"✅ {len(events)}개 이벤트 감지 및 저장 완료")
+    def _data_signature(self, days_back=30):
+        """대시보드 입력 서명 (코드 버전 + 조회 시작 날짜 + 기간 내 트래픽 집계 + 기간 내 이벤트 내용)"""
+        cutoff = _cutoff_date(days_back)
+        row = self._conn.execute('''
+            SELECT 
+                ?,
+                (SELECT MAX(collection_date) FROM daily_traffic),
+                COUNT(*),
+                TOTAL(players_online),
+                TOTAL(cash_players),
+                TOTAL(peak_24h),
+                TOTAL(seven_day_avg)
+            FROM daily_traffic 
+            WHERE collection_date >= ?
+        ''', (cutoff, cutoff)).fetchone()
+        
+        signature = hashlib.blake2b(_DASHBOARD_VERSION, digest_size=16)
+        signature.update(repr(row).encode('utf-8'))
+        
+        # 이벤트는 id가 아닌 차트에 쓰이는 내용으로 서명 (INSERT OR REPLACE 재저장은 id만 바뀜)
+        events = self._conn.execute('''
+            SELECT event_date, event_title, event_type, affected_sites, impact_level
+            FROM poker_events 
+            WHERE event_date >= ?
+            ORDER BY event_date, news_url, event_title
+        ''', (cutoff,))
+        for event in events:
+            signature.update(repr(event).encode('utf-8'))
+        return signature.hexdigest()
     
-    # HTML 대시보드 생성
-    html_file = dashboard.generate_dashboard_html()
-    print(f"📊 대시보드 생성 완료: {html_file}")
+    def generate_dashboard_html(self, output_file='poker_dashboard.html'):
+        """HTML 대시보드 생성"""
+        # 입력 데이터와 코드가 지난 생성 때와 같고 출력 파일이 모두 있으면 기존 파일 재사용
+        signature = self._data_signature(30)
+        signature_file = output_file + '.sig'
+        if os.path.exists(output_file) and os.path.exists(output_file + '.gz'):
+            try:
+                with open(signature_file, encoding='utf-8') as f:
+                    if f.read() == signature:
+                        return output_file
+            except OSError:
+                pass
+        
+        # 모든 차트 데이터 생성 - 차트별로 스레드에서 병렬 실행
+        # (트래픽 데이터는 한 번만 조회해 공유, 레이더 조회는 그동안 워커에서 진행)
+        try:
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                radar = executor.submit(self.generate_radar_chart)
+                traffic = self._load_traffic(30)
+                futures = {
+                    'multi_line': executor.submit(self.generate_multi_line_chart, traffic=traffic),
+                    'radar': radar,
+                    'heatmap': executor.submit(self.generate_heatmap_chart, traffic=traffic),
+                    'bubble': executor.submit(self.generate_bubble_chart, traffic=traffic),
+                    'stacked_bar': executor.submit(self.generate_stacked_bar_chart, traffic=traffic)
+                }
+                charts = {name: future.result() for name, future in futures.items()}
+        finally:
+            self._close_readers()
+        
+        # orjson은 UTF-8 bytes를 바로 만들어 주므로 디코딩만 하면 됨
+        if orjson is not None:
+            payload = orjson.dumps(charts).decode('utf-8')
+        else:
+            payload = json.dumps(charts, ensure_ascii=False)
+        
+        html = ''.join((_HTML_PRE, payload, _HTML_POST)).encode('utf-8')
+        with open(output_file, 'wb') as f:
+            f.write(html)
+        
+        # 웹 서버가 그대로 내보낼 수 있는 gzip 사전 압축본 (gzip_static 등)
+        with gzip.open(output_file + '.gz', 'wb', compresslevel=6) as gz:
+            gz.write(html)
+        
+        with open(signature_file, 'w', encoding='utf-8') as f:
+            f.write(signature)
+            
+        return output_file
+
+def main():
+    """샘플 실행"""
+    print("🎯 포커 대시보드 생성...")
     
+    with closing(PokerDashboard()) as dashboard:
+        
+        # 샘플 뉴스 이벤트 생성
+        sample_news = [
+            {
+                'title': 'PokerStars SCOOP 2024 Main Event Final Table',
+                'content': 'The biggest online poker tournament series continues with massive guarantees',
+                'date': '2024-07-15',
+                'url': 'https://pokernews.com/news/2024/07/pokerstars-scoop-main-event.htm'
+            },
+            {
+                'title': 'GGPoker WSOP Satellite Promotion',
+                'content': 'Win your seat to the World Series of Poker with special satellite tournaments',
+                'date': '2024-07-18',
+                'url': 'https://pokernews.com/news/2024/07/ggpoker-wsop-satellite.htm'
+            },
+            {
+                'title': 'WPT Global Summer Festival',
+                'content': 'Massive tournament series with over $50M guaranteed across all events',
+                'date': '2024-07-10',
+                'url': 'https://pokernews.com/news/2024/07/wpt-global-summer.htm'
+            }
+        ]
+        
+        # 이벤트 감지 및 저장
+        events = dashboard.detect_news_events(sample_news)
+        dashboard.save_events(events)
+        
+        print(f"✅ {len(events)}개 이벤트 감지 및 저장 완료")
+        
+        # HTML 대시보드 생성
+        html_file = dashboard.generate_dashboard_html()
+        print(f"📊 대시보드 생성 완료: {html_file}")
+        
     return html_file
 
 if __name__ == "__main__":
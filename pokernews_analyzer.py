@@ -3,7 +3,9 @@
 """
 PokerNews.com 사이트 구조 분석 및 크롤링 테스트
 """
+import os
 import sys
+import shelve
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
@@ -12,11 +14,52 @@ from bs4 import BeautifulSoup
 import json
 import re
 from datetime import datetime, timedelta
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from scraper_utils import get_with_retry
+
+try:
+    import orjson
+except ImportError:  # orjson 미설치 시 표준 json 사용
+    orjson = None
+
+# 상대 경로 링크에 붙이는 사이트 주소
+BASE_URL = 'https://www.pokernews.com'
+
+# 기사 탐색용 정규식 (모듈 로드 시 한 번만 컴파일)
+NEWS_LINK_PATTERN = re.compile(r'/(news|article|story|post)/')
+NEWS_HREF_PATTERN = re.compile(r'/(news|article)/')
+DATE_CLASS_PATTERN = re.compile(r'date|time')
+CONTAINER_CLASS_PATTERN = re.compile(r'news|article|post|story|content')
+
+# 뉴스 관련으로 보이는 클래스명 (출력 순서 유지)
+NEWS_CLASSES = (
+    'news-item', 'article-item', 'post', 'entry',
+    'story', 'content-item', 'news-card', 'article-card',
+    'post-item', 'news-list-item'
+)
+NEWS_CLASS_SET = frozenset(NEWS_CLASSES)
+HEADING_TAGS = frozenset(('h1', 'h2', 'h3', 'h4'))
+
+# 구조 분석 URL별 ETag/Last-Modified와 본문 저장소 (변경 없는 페이지는 304로 받고 저장본 재사용)
+HTTP_CACHE_FILE = 'pn_http_cache'
 
 class PokerNewsAnalyzer:
     def __init__(self):
         self.scraper = cloudscraper.create_scraper()
         
+    def _clone_scraper(self):
+        """워커 스레드 전용 scraper 생성 (현재 쿠키와 User-Agent로 시작)
+        
+        requests.Session은 스레드 안전하지 않고 cloudscraper는 챌린지를 풀면서 세션의 쿠키/헤더를 바꾸므로
+        동시 요청끼리 세션을 공유하지 않음
+        """
+        scraper = cloudscraper.create_scraper()
+        if 'User-Agent' in self.scraper.headers:
+            scraper.headers['User-Agent'] = self.scraper.headers['User-Agent']
+        scraper.cookies.update(self.scraper.cookies)
+        return scraper
+        
     def analyze_pokernews_structure(self):
         """PokerNews 사이트 구조 분석"""
         print("🔍 PokerNews.com 구조 분석 중...")
@@ -29,58 +72,114 @@ class PokerNewsAnalyzer:
             'https://www.pokernews.com/live/',
         ]
         
-        for url in urls_to_test:
-            try:
-                print(f"\n📄 분석 중: {url}")
-                response = self.scraper.get(url, timeout=15)
-                
-                if response.status_code == 200:
-                    print(f"✅ 접근 성공! 크기: {len(response.content)} bytes")
-                    
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # 기사 관련 요소들 찾기
-                    self.find_article_elements(soup, url)
+        # 서로 독립적인 요청이므로 동시에 보내고, 응답이 도착하는 순서대로 분석
+        # (shelve는 스레드 안전하지 않으므로 캐시 조회/갱신은 현재 스레드에서만 수행)
+        # 요청마다 전용 scraper를 쓰고, 받은 쿠키는 현재 스레드에서 원래 scraper에 합침
+        with shelve.open(HTTP_CACHE_FILE) as http_cache, \
+                ThreadPoolExecutor(max_workers=len(urls_to_test)) as executor:
+            futures = {}
+            for url in urls_to_test:
+                scraper = self._clone_scraper()
+                future = executor.submit(get_with_retry, scraper, url, timeout=15,
+                                         headers=self._conditional_headers(http_cache.get(url)))
+                futures[future] = (url, scraper)
+            
+            for future in as_completed(futures):
+                url, scraper = futures[future]
+                self.scraper.cookies.update(scraper.cookies)
+                scraper.close()
+                try:
+                    print(f"\n📄 분석 중: {url}")
+                    response = future.result()
                     
-                else:
-                    print(f"❌ 접근 실패: HTTP {response.status_code}")
+                    if response.status_code == 304 and url in http_cache:
+                        content = http_cache[url]['content']
+                        print(f"♻️ 변경 없음 (HTTP 304), 저장본 사용! 크기: {len(content)} bytes")
+                    elif response.status_code == 200:
+                        content = response.content
+                        print(f"✅ 접근 성공! 크기: {len(content)} bytes")
+                        self._store_validators(http_cache, url, response)
+                    else:
+                        content = None
                     
-            except Exception as e:
-                print(f"❌ 오류: {str(e)}")
+                    if content is not None:
+                        soup = BeautifulSoup(content, 'html.parser')
+                        
+                        # 기사 관련 요소들 찾기
+                        self.find_article_elements(soup, url, content)
+                        
+                    else:
+                        print(f"❌ 접근 실패: HTTP {response.status_code}")
+                        
+                except Exception as e:
+                    print(f"❌ 오류: {str(e)}")
                 
-    def find_article_elements(self, soup, url):
+    @staticmethod
+    def _conditional_headers(entry):
+        """저장된 ETag/Last-Modified로 조건부 요청 헤더 생성 (저장본이 없으면 None)"""
+        if not entry:
+            return None
+        
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+        
+    @staticmethod
+    def _store_validators(http_cache, url, response):
+        """200 응답의 ETag/Last-Modified와 본문 저장 (검증자가 없으면 저장하지 않음)"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            http_cache[url] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'content': response.content
+            }
+        elif url in http_cache:
+            del http_cache[url]
+            
+    def find_article_elements(self, soup, url, content=None):
         """기사 관련 요소들 찾기"""
         print("  🔎 기사 요소 탐색:")
         
+        # 문서를 한 번만 순회하면서 article/클래스/링크/제목 태그를 함께 집계
+        article_count = 0
+        class_counts = Counter()
+        news_links = []
+        heading_count = 0
+        
+        for tag in soup.find_all(True):
+            name = tag.name
+            if name == 'article':
+                article_count += 1
+            elif name in HEADING_TAGS:
+                heading_count += 1
+            elif name == 'a':
+                href = tag.get('href')
+                if href is not None and NEWS_LINK_PATTERN.search(href):
+                    text = tag.text.strip()
+                    if text:
+                        news_links.append({
+                            'url': href,
+                            'title': text[:50] + '...' if len(text) > 50 else text
+                        })
+            
+            classes = tag.get('class')
+            if classes:
+                class_counts.update(NEWS_CLASS_SET.intersection(classes))
+        
         # 1. article 태그
-        articles = soup.find_all('article')
-        print(f"    • article 태그: {len(articles)}개")
+        print(f"    • article 태그: {article_count}개")
         
         # 2. 다양한 뉴스 관련 클래스들
-        news_classes = [
-            'news-item', 'article-item', 'post', 'entry',
-            'story', 'content-item', 'news-card', 'article-card',
-            'post-item', 'news-list-item'
-        ]
-        
-        for class_name in news_classes:
-            elements = soup.find_all(class_=class_name)
-            if elements:
-                print(f"    • .{class_name}: {len(elements)}개")
+        for class_name in NEWS_CLASSES:
+            if class_counts[class_name]:
+                print(f"    • .{class_name}: {class_counts[class_name]}개")
                 
         # 3. 링크 패턴 분석
-        links = soup.find_all('a', href=True)
-        news_links = []
-        pattern = r'/(news|article|story|post)/'
-        
-        for link in links:
-            href = link.get('href', '')
-            if re.search(pattern, href) and link.text.strip():
-                news_links.append({
-                    'url': href,
-                    'title': link.text.strip()[:50] + '...' if len(link.text.strip()) > 50 else link.text.strip()
-                })
-                
         print(f"    • 뉴스 링크 패턴: {len(news_links)}개")
         
         # 샘플 링크 출력
@@ -90,25 +189,28 @@ class PokerNewsAnalyzer:
                 print(f"      {i+1}. {link['title']}")
                 
         # 4. 제목 태그들
-        headings = soup.find_all(['h1', 'h2', 'h3', 'h4'])
-        print(f"    • 제목 태그: {len(headings)}개")
+        print(f"    • 제목 태그: {heading_count}개")
         
         # 5. 특정 URL에서 더 자세한 분석
         if 'news' in url:
-            self.analyze_news_page(soup)
+            self.analyze_news_page(soup, content)
             
-    def analyze_news_page(self, soup):
-        """뉴스 페이지 상세 분석"""
+    def analyze_news_page(self, soup, content=None):
+        """뉴스 페이지 상세 분석 (content: 응답 원본 바이트)"""
         print("  📰 뉴스 페이지 상세 분석:")
         
-        # HTML 구조 저장
-        with open('pokernews_structure.html', 'w', encoding='utf-8') as f:
-            f.write(str(soup.prettify()))
+        # HTML 구조 저장 (원본 바이트를 그대로 기록, 들여쓰기된 구조는 DEBUG_PRETTY 설정 시에만 생성)
+        if content is None or os.getenv('DEBUG_PRETTY'):
+            with open('pokernews_structure.html', 'w', encoding='utf-8') as f:
+                f.write(str(soup.prettify()))
+        else:
+            with open('pokernews_structure.html', 'wb') as f:
+                f.write(content)
         print("    💾 HTML 구조 저장: pokernews_structure.html")
         
         # 잠재적 기사 컨테이너 찾기
         potential_containers = soup.find_all(['div', 'section', 'main'], 
-                                           class_=re.compile(r'news|article|post|story|content'))
+                                           class_=CONTAINER_CLASS_PATTERN)
         
         print(f"    • 잠재적 기사 컨테이너: {len(potential_containers)}개")
         
@@ -121,7 +223,7 @@ class PokerNewsAnalyzer:
         print("\n🧪 PokerNews 뉴스 추출 테스트...")
         
         try:
-            response = self.scraper.get('https://www.pokernews.com/news/', timeout=15)
+            response = get_with_retry(self.scraper, 'https://www.pokernews.com/news/', timeout=15)
             
             if response.status_code == 200:
                 soup = BeautifulSoup(response.content, 'html.parser')
@@ -173,12 +275,12 @@ class PokerNewsAnalyzer:
                 if link_elem:
                     url = link_elem.get('href', '')
                     if not url.startswith('http'):
-                        url = 'https://www.pokernews.com' + url
+                        url = BASE_URL + url
                 else:
                     url = ''
                     
                 # 날짜 찾기
-                date_elem = article.find('time') or article.find(class_=re.compile(r'date|time'))
+                date_elem = article.find('time') or article.find(class_=DATE_CLASS_PATTERN)
                 date = date_elem.get_text().strip() if date_elem else ''
                 
                 # 요약 찾기
@@ -201,19 +303,20 @@ class PokerNewsAnalyzer:
         
     def extract_from_links(self, soup):
         """링크 패턴에서 뉴스 추출"""
-        links = soup.find_all('a', href=re.compile(r'/(news|article)/'))
+        links = soup.find_all('a', href=NEWS_HREF_PATTERN)
         results = []
         seen_urls = set()
         
         for link in links:
             try:
-                url = link.get('href', '')
-                if not url.startswith('http'):
-                    url = 'https://www.pokernews.com' + url
-                    
-                if url in seen_urls:
+                # 중복 확인은 원본 href로 (사이트 절대 주소는 접두어를 떼어 상대 경로와 같은 키로 취급)
+                href = link.get('href', '')
+                key = href[len(BASE_URL):] if href.startswith(BASE_URL) else href
+                if key in seen_urls:
                     continue
-                seen_urls.add(url)
+                seen_urls.add(key)
+                
+                url = href if href.startswith('http') else BASE_URL + href
                 
                 title = link.get_text().strip()
                 if title and len(title) > 10:
@@ -244,24 +347,10 @@ class PokerNewsAnalyzer:
         
         for selector in selectors:
             try:
-                elements = soup.select(selector)
+                # 앞의 15개만 쓰므로 15개를 찾으면 탐색 중단 (6개 이상 여부도 이 범위로 판정 가능)
+                elements = soup.select(selector, limit=15)
                 if len(elements) > 5:
-                    results = []
-                    for elem in elements[:15]:
-                        title = elem.get_text().strip()
-                        url = elem.get('href', '')
-                        if not url.startswith('http'):
-                            url = 'https://www.pokernews.com' + url
-                            
-                        if title and len(title) > 10:
-                            results.append({
-                                'title': title,
-                                'url': url,
-                                'date': datetime.now().strftime('%Y-%m-%d'),
-                                'summary': '',
-                                'source': 'PokerNews'
-                            })
-                            
+                    results = list(self._iter_links(elements))
                     if len(results) > 5:
                         print(f"    성공한 선택자: {selector}")
                         return results
@@ -271,6 +360,26 @@ class PokerNewsAnalyzer:
                 
         return None
         
+    def _iter_links(self, elements):
+        """링크 요소에서 제목이 충분히 긴 기사 정보를 순서대로 생성"""
+        today = datetime.now().strftime('%Y-%m-%d')
+        for elem in elements:
+            title = elem.get_text().strip()
+            if not title or len(title) <= 10:
+                continue
+            
+            url = elem.get('href', '')
+            if not url.startswith('http'):
+                url = BASE_URL + url
+            
+            yield {
+                'title': title,
+                'url': url,
+                'date': today,
+                'summary': '',
+                'source': 'PokerNews'
+            }
+            
     def save_sample_data(self, articles):
         """샘플 데이터 저장"""
         if not articles:
@@ -283,8 +392,12 @@ class PokerNewsAnalyzer:
             'data': articles
         }
         
-        with open('pokernews_sample_data.json', 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            with open('pokernews_sample_data.json', 'wb') as f:
+                f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2))
+        else:
+            with open('pokernews_sample_data.json', 'w', encoding='utf-8') as f:
+                json.dump(output, f, indent=2, ensure_ascii=False)
             
         return True
         
@@ -294,17 +407,19 @@ class PokerNewsAnalyzer:
             print("❌ 추출된 기사가 없습니다.")
             return
             
-        print(f"\n📰 PokerNews 기사 {len(articles)}개 추출 성공!")
-        print("="*80)
+        # 줄 단위 print 대신 전체 출력을 모아 한 번에 기록
+        lines = [f"\n📰 PokerNews 기사 {len(articles)}개 추출 성공!", "="*80]
         
         for i, article in enumerate(articles[:10], 1):
-            print(f"{i:2d}. {article['title']}")
+            lines.append(f"{i:2d}. {article['title']}")
             if article['date']:
-                print(f"    📅 {article['date']}")
+                lines.append(f"    📅 {article['date']}")
             if article['summary']:
-                print(f"    📝 {article['summary'][:80]}...")
-            print(f"    🔗 {article['url']}")
-            print()
+                lines.append(f"    📝 {article['summary'][:80]}...")
+            lines.append(f"    🔗 {article['url']}")
+            lines.append("")
+            
+        print('\n'.join(lines))
 
 def main():
     """메인 실행 함수"""
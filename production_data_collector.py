@@ -13,14 +13,18 @@ if sys.platform == 'win32':
 
 import os
 import time
+import atexit
+import functools
 import logging
 import sqlite3
 from datetime import datetime, timedelta
 import cloudscraper
-from bs4 import BeautifulSoup
+from lxml import etree
+from concurrent.futures import ThreadPoolExecutor
 import re
 import json
 from gg_poker_monitoring import GGPokerMonitoringPlatform
+from scraper_utils import get_with_retry, load_scraper_session, save_scraper_session
 
 # 로깅 설정
 logging.basicConfig(
@@ -33,15 +37,126 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 사이트명 정규화 매핑 (소문자 원본명 → 표준명)
+SITE_NAME_MAPPING = {
+    'ggnetwork': 'GGNetwork',
+    'gg network': 'GGNetwork',
+    'ggpoker': 'GGNetwork',
+    'gg poker': 'GGNetwork',
+    'ggpoker on': 'GGPoker ON',
+    'pokerstars': 'PokerStars',
+    'pokerstars ontario': 'PokerStars Ontario',
+    'pokerstars.it': 'PokerStars.it',
+    'wpt global': 'WPT Global',
+    'worldpokertour': 'WPT Global',
+    '888poker': '888poker',
+    '888 poker': '888poker',
+    'partypoker': 'partypoker',
+    'party poker': 'partypoker',
+    'chico poker': 'Chico Poker',
+    'chico': 'Chico Poker',
+    'ipoker': 'iPoker',
+    'winamax': 'Winamax'
+}
+
+# 숫자 조각 추출용 정규식 (모듈 로드 시 한 번만 컴파일)
+DIGITS_PATTERN = re.compile(r'\d+')
+
+# PokerScout 순위 테이블 행/셀 XPath (모듈 로드 시 한 번만 컴파일)
+RANK_ROWS_XPATH = etree.XPath('descendant::tr[position() > 1]')  # 헤더 제외
+ROW_CELLS_XPATH = etree.XPath('descendant::td')
+
+def _stream_rank_table(response):
+    """스트리밍 응답을 청크 단위로 파싱하다가 랭킹 테이블이 닫히는 즉시 그 요소를 반환 (없으면 None)
+    
+    테이블 뒤의 본문은 더 내려받지 않으므로 다운로드와 파싱이 겹치고 전체 문서를 메모리에 두지 않음
+    """
+    parser = etree.HTMLPullParser(events=('end',), tag='table')
+    for chunk in response.iter_content(chunk_size=65536):
+        parser.feed(chunk)
+        for _, table in parser.read_events():
+            if 'rankTable' in table.get('class', '').split():
+                return table
+    
+    # 문서 끝까지 닫히지 않은 테이블은 close() 이후에 이벤트로 전달됨
+    parser.close()
+    for _, table in parser.read_events():
+        if 'rankTable' in table.get('class', '').split():
+            return table
+    return None
+
+def _cell_text(cell):
+    """셀 텍스트 추출 (BeautifulSoup get_text(strip=True)와 동일하게 조각별 공백 제거 후 연결)"""
+    return ''.join(text.strip() for text in cell.itertext())
+
+def _to_int(cell):
+    """셀의 숫자 조각만 이어 붙여 정수로 변환 ('12,345' → 12345, '3,100+' → 3100, 숫자가 없으면 0)"""
+    digits = DIGITS_PATTERN.findall(_cell_text(cell))
+    return int(''.join(digits)) if digits else 0
+
+def parse_pokerscout_counts(cells):
+    """순위 테이블 행의 고정 열에서 (접속자, 캐시 플레이어, 24H 피크, 7일 평균) 추출
+    
+    열 구성이 항상 같으므로 열 번호를 고정해 한 번에 변환 (사이트명은 cells[1])
+    """
+    return _to_int(cells[2]), _to_int(cells[3]), _to_int(cells[4]), _to_int(cells[5])
+
 class ProductionDataCollector:
     def __init__(self, db_path='gg_poker_monitoring.db'):
         self.db_path = db_path
         self.scraper = cloudscraper.create_scraper(
             browser={'browser': 'chrome', 'platform': 'windows', 'mobile': False}
         )
+        # 챌린지는 한 번만 풀고, 이후 요청은 같은 연결과 토큰을 재사용
+        self.scraper.headers.update({'Connection': 'keep-alive'})
+        restored = load_scraper_session(self.scraper)
+        if restored:
+            logger.info(f"🍪 Cloudflare 세션 복원: 쿠키 {restored}개")
         self.monitoring_platform = GGPokerMonitoringPlatform(db_path)
         self.setup_target_sites()
         
+        # 수집 통계용 연결은 인스턴스 수명 동안 재사용 (스키마 생성과 PRAGMA도 한 번만)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self.setup_collection_stats()
+        # 변화 감지는 수집 결과 반환을 막지 않도록 백그라운드에서 순서대로 실행 (첫 제출 시 생성)
+        self._change_executor = None
+        atexit.register(self.close)
+        
+    def close(self):
+        """DB 연결 종료 (여러 번 호출해도 안전, 진행 중인 변화 감지는 끝날 때까지 대기)"""
+        # 종료한 인스턴스를 atexit 훅이 프로세스 끝까지 붙잡고 있지 않도록 해제
+        atexit.unregister(self.close)
+        if self._change_executor is not None:
+            self._change_executor.shutdown(wait=True)
+            self._change_executor = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+            self.monitoring_platform.close()
+        
+    def setup_collection_stats(self):
+        """수집 통계 테이블 생성"""
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS collection_stats (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                collection_date DATE NOT NULL,
+                collection_time TIME NOT NULL,
+                total_sites_collected INTEGER,
+                gg_poker_sites INTEGER,
+                total_players INTEGER,
+                total_cash_players INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        # 최근 N일 요약 조회가 날짜 범위 탐색을 인덱스로 처리하도록
+        self._conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_collection_stats_date
+            ON collection_stats(collection_date)
+        ''')
+        self._conn.commit()
+        
     def setup_target_sites(self):
         """수집 대상 사이트 설정 (GG POKER 포함)"""
         self.target_sites = {
@@ -104,6 +219,9 @@ class ProductionDataCollector:
             }
         }
         
+        # 검증 시 행마다 중첩 dict를 타지 않도록 예상 플레이어 수만 따로 보관
+        self._expected = {name: site['expected_players'] for name, site in self.target_sites.items()}
+        
         logger.info(f"📋 수집 대상 사이트 설정 완료: {len(self.target_sites)}개")
         
     def crawl_pokerscout_data(self):
@@ -111,51 +229,41 @@ class ProductionDataCollector:
         logger.info("🔍 PokerScout 데이터 크롤링 시작...")
         
         try:
-            # PokerScout 메인 페이지 크롤링
-            response = self.scraper.get('https://www.pokerscout.com', timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # PokerScout 메인 페이지 크롤링 (받는 동안 lxml로 파싱, 랭킹 테이블이 닫히면 수신 중단)
+            with get_with_retry(self.scraper, 'https://www.pokerscout.com', timeout=30, stream=True) as response:
+                response.raise_for_status()
+                save_scraper_session(self.scraper)
+                
+                # 랭킹 테이블 찾기
+                table = _stream_rank_table(response)
             
-            # 랭킹 테이블 찾기
-            table = soup.find('table', {'class': 'rankTable'})
-            if not table:
+            if table is None:
                 logger.error("❌ PokerScout 랭킹 테이블을 찾을 수 없습니다")
                 return []
             
             collected_data = []
-            rows = table.find_all('tr')[1:]  # 헤더 제외
+            rows = RANK_ROWS_XPATH(table)
+            # 행 루프 안에서 반복되는 속성 조회를 미리 로컬로
+            normalize_site_name = self.normalize_site_name
+            target_sites = self.target_sites
             
             for row in rows:
                 try:
-                    cells = row.find_all('td')
+                    cells = ROW_CELLS_XPATH(row)
                     if len(cells) < 6:
                         continue
                     
                     # 사이트명 추출
                     site_name_cell = cells[1]
-                    site_name = site_name_cell.get_text(strip=True)
+                    site_name = _cell_text(site_name_cell)
                     
                     # 정확한 사이트명 매칭
-                    normalized_site = self.normalize_site_name(site_name)
-                    if normalized_site not in self.target_sites:
+                    normalized_site = normalize_site_name(site_name)
+                    if normalized_site not in target_sites:
                         continue
                     
-                    # 플레이어 수 추출
-                    players_text = cells[2].get_text(strip=True).replace(',', '')
-                    players_online = int(re.sub(r'[^\d]', '', players_text)) if players_text.isdigit() else 0
-                    
-                    # 캐시 플레이어 추출
-                    cash_text = cells[3].get_text(strip=True).replace(',', '')
-                    cash_players = int(re.sub(r'[^\d]', '', cash_text)) if cash_text.isdigit() else 0
-                    
-                    # 24시간 피크 추출
-                    peak_text = cells[4].get_text(strip=True).replace(',', '')
-                    peak_24h = int(re.sub(r'[^\d]', '', peak_text)) if peak_text.isdigit() else 0
-                    
-                    # 7일 평균 추출
-                    avg_text = cells[5].get_text(strip=True).replace(',', '')
-                    seven_day_avg = int(re.sub(r'[^\d]', '', avg_text)) if avg_text.isdigit() else 0
+                    # 플레이어 수, 캐시 플레이어, 24시간 피크, 7일 평균 추출
+                    players_online, cash_players, peak_24h, seven_day_avg = parse_pokerscout_counts(cells)
                     
                     site_data = {
                         'site_name': normalized_site,
@@ -169,55 +277,46 @@ class ProductionDataCollector:
                     
                     collected_data.append(site_data)
                     
-                    logger.info(f"✅ {normalized_site}: {players_online:,}명 (캐시: {cash_players:,}명)")
-                    
                 except Exception as e:
                     logger.error(f"❌ 행 파싱 오류: {str(e)}")
                     continue
             
-            logger.info(f"🎯 PokerScout 크롤링 완료: {len(collected_data)}개 사이트")
+            # 사이트별 수치는 행마다 로깅하지 않고 완료 로그 한 줄에 모아서 기록
+            site_summary = ', '.join(
+                f"{d['site_name']} {d['players_online']:,}명 (캐시: {d['cash_players']:,}명)"
+                for d in collected_data
+            )
+            logger.info(f"🎯 PokerScout 크롤링 완료: {len(collected_data)}개 사이트 - {site_summary}")
             return collected_data
             
         except Exception as e:
             logger.error(f"❌ PokerScout 크롤링 실패: {str(e)}")
             return []
     
-    def normalize_site_name(self, raw_name):
-        """사이트명 정규화"""
-        name_mapping = {
-            'ggnetwork': 'GGNetwork',
-            'gg network': 'GGNetwork', 
-            'ggpoker': 'GGNetwork',
-            'gg poker': 'GGNetwork',
-            'ggpoker on': 'GGPoker ON',
-            'pokerstars': 'PokerStars',
-            'pokerstars ontario': 'PokerStars Ontario',
-            'pokerstars.it': 'PokerStars.it',
-            'wpt global': 'WPT Global',
-            'worldpokertour': 'WPT Global',
-            '888poker': '888poker',
-            '888 poker': '888poker',
-            'partypoker': 'partypoker',
-            'party poker': 'partypoker',
-            'chico poker': 'Chico Poker',
-            'chico': 'Chico Poker',
-            'ipoker': 'iPoker',
-            'winamax': 'Winamax'
-        }
-        
-        normalized = raw_name.lower().strip()
-        return name_mapping.get(normalized, raw_name)
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def normalize_site_name(raw_name):
+        """사이트명 정규화 (원본 사이트명은 매일 반복되므로 결과를 캐시)"""
+        return SITE_NAME_MAPPING.get(raw_name.lower().strip(), raw_name)
     
     def validate_data_quality(self, data):
-        """데이터 품질 검증"""
+        """데이터 품질 검증
+        
+        검증을 통과한 데이터와 수집 통계(GG POKER 사이트 수, 총 플레이어, 캐시 플레이어)를
+        한 번의 순회로 함께 계산해 (validated_data, stats) 튜플로 반환
+        """
         validated_data = []
+        gg_poker_sites = 0
+        total_players = 0
+        total_cash_players = 0
+        expected_players = self._expected
         
         for site_data in data:
             site_name = site_data['site_name']
             players = site_data['players_online']
             
             # 예상 플레이어 수와 비교하여 이상치 검증
-            expected = self.target_sites.get(site_name, {}).get('expected_players', 0)
+            expected = expected_players.get(site_name, 0)
             
             # 너무 크거나 작은 값 필터링
             if expected > 0:
@@ -237,12 +336,22 @@ class ProductionDataCollector:
                 site_data['cash_players'] = players  # 수정
             
             validated_data.append(site_data)
+            if 'GG' in site_name:
+                gg_poker_sites += 1
+            total_players += players
+            total_cash_players += site_data['cash_players']
+        
+        stats = {
+            'gg_poker_sites': gg_poker_sites,
+            'total_players': total_players,
+            'total_cash_players': total_cash_players
+        }
         
         logger.info(f"✅ 데이터 검증 완료: {len(validated_data)}/{len(data)}개 유효")
-        return validated_data
+        return validated_data, stats
     
-    def save_daily_data(self, data):
-        """일일 데이터 저장"""
+    def save_daily_data(self, data, stats):
+        """일일 데이터 저장 (stats는 validate_data_quality가 반환한 수집 통계)"""
         if not data:
             logger.error("❌ 저장할 데이터가 없습니다")
             return False
@@ -255,9 +364,9 @@ class ProductionDataCollector:
                 'collection_date': datetime.now().strftime('%Y-%m-%d'),
                 'collection_time': datetime.now().strftime('%H:%M:%S'),
                 'total_sites_collected': collected_count,
-                'gg_poker_sites': len([d for d in data if 'GG' in d['site_name']]),
-                'total_players': sum(d['players_online'] for d in data),
-                'total_cash_players': sum(d['cash_players'] for d in data)
+                'gg_poker_sites': stats['gg_poker_sites'],
+                'total_players': stats['total_players'],
+                'total_cash_players': stats['total_cash_players']
             }
             
             logger.info(f"💾 일일 데이터 저장 완료:")
@@ -277,23 +386,9 @@ class ProductionDataCollector:
     
     def save_collection_stats(self, stats):
         """수집 통계 저장"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn
         cursor = conn.cursor()
         
-        # 수집 통계 테이블 생성
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS collection_stats (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                collection_date DATE NOT NULL,
-                collection_time TIME NOT NULL,
-                total_sites_collected INTEGER,
-                gg_poker_sites INTEGER,
-                total_players INTEGER,
-                total_cash_players INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
         cursor.execute('''
             INSERT INTO collection_stats 
             (collection_date, collection_time, total_sites_collected, gg_poker_sites,
@@ -309,10 +404,13 @@ class ProductionDataCollector:
         ))
         
         conn.commit()
-        conn.close()
     
     def run_daily_collection(self):
-        """일일 데이터 수집 실행"""
+        """일일 데이터 수집 실행
+        
+        PokerScout는 현재 시점 데이터만 제공하므로 지난 날짜를 백필할 수 없음
+        (여러 번 병렬 실행해도 같은 페이지를 받아 오늘 날짜 스냅샷만 늘어나므로 하루 한 번 실행)
+        """
         start_time = datetime.now()
         logger.info(f"🚀 일일 데이터 수집 시작: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
         
@@ -325,18 +423,18 @@ class ProductionDataCollector:
                 return False
             
             # 2. 데이터 검증
-            validated_data = self.validate_data_quality(raw_data)
+            validated_data, stats = self.validate_data_quality(raw_data)
             
             # 3. 데이터 저장
-            success = self.save_daily_data(validated_data)
+            success = self.save_daily_data(validated_data, stats)
             
-            # 4. 변화 감지 (전일 대비)
+            # 4. 변화 감지 (전일 대비, 백그라운드 실행)
             if success:
-                changes = self.monitoring_platform.detect_significant_changes()
-                if changes:
-                    logger.info(f"🚨 유의미한 변화 감지: {len(changes)}건")
-                    for change in changes[:3]:  # 상위 3개만 로깅
-                        logger.info(f"  📈 {change['site_name']}: {change['metric']} {change['change_percentage']:+.1f}%")
+                if self._change_executor is None:
+                    self._change_executor = ThreadPoolExecutor(max_workers=1)
+                self._change_executor.submit(
+                    self.log_significant_changes, start_time.strftime('%Y-%m-%d')
+                )
             
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
@@ -349,9 +447,24 @@ class ProductionDataCollector:
             logger.error(f"❌ 일일 데이터 수집 실패: {str(e)}")
             return False
     
+    def log_significant_changes(self, target_date):
+        """유의미한 변화 감지 후 상위 3건 로깅 (백그라운드 스레드에서 실행)"""
+        try:
+            # SQLite 연결은 생성한 스레드에서만 쓸 수 있으므로 이 스레드 전용 인스턴스 사용
+            with GGPokerMonitoringPlatform(self.db_path) as platform:
+                changes = platform.detect_significant_changes(target_date)
+        except Exception as e:
+            logger.error(f"❌ 변화 감지 실패: {str(e)}")
+            return
+        
+        if changes:
+            logger.info(f"🚨 유의미한 변화 감지: {len(changes)}건")
+            for change in changes[:3]:  # 상위 3개만 로깅
+                logger.info(f"  📈 {change['site_name']}: {change['metric']} {change['change_percentage']:+.1f}%")
+    
     def get_collection_summary(self, days_back=7):
         """수집 현황 요약"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn
         cursor = conn.cursor()
         
         # 최근 수집 통계
@@ -363,9 +476,9 @@ class ProductionDataCollector:
                 total_players,
                 total_cash_players
             FROM collection_stats 
-            WHERE collection_date >= date('now', '-' || ? || ' days')
+            WHERE collection_date >= date('now', ?)
             ORDER BY collection_date DESC
-        ''', (days_back,))
+        ''', (f'-{days_back} days',))
         
         recent_stats = cursor.fetchall()
         
@@ -404,7 +517,6 @@ class ProductionDataCollector:
                 'cash_players': stat[4]
             })
         
-        conn.close()
         return summary
 
 def main():
@@ -10,6 +10,7 @@ if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
 import json
+import re
 import logging
 import sqlite3
 from datetime import datetime, timedelta
@@ -19,27 +20,75 @@ import statistics
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 뉴스 분석 키워드 (표시용 원본, 비교용 소문자)
+TRENDING_KEYWORDS = tuple(
+    (keyword, keyword.lower())
+    for keyword in ['WSOP', 'PokerStars', 'GGPoker', 'tournament', 'bracelet', 'high stakes', 'online poker']
+)
+BRAND_KEYWORDS = tuple(
+    (brand, brand.lower())
+    for brand in ['PokerStars', 'GGPoker', 'WPT Global', '888poker', 'partypoker']
+)
+IMPACT_KEYWORDS = ('regulation', 'launch', 'partnership', 'acquisition', 'license', 'ban')
+TOURNAMENT_KEYWORDS = tuple(keyword.lower() for keyword in ['WSOP', 'WPT', 'EPT', 'tournament', 'bracelet'])
+
+def _keyword_pattern(keywords):
+    """소문자 키워드 집합을 한 번에 찾는 정규식 (겹치는 키워드도 모두 찾도록 전방탐색 사용)
+    
+    같은 위치에서 시작하는 키워드는 하나만 잡히므로 한 집합 안의 키워드는 서로의 접두어가 아니어야 함
+    """
+    return re.compile('(?=(' + '|'.join(map(re.escape, keywords)) + '))')
+
+TRENDING_PATTERN = _keyword_pattern(keyword_lower for _, keyword_lower in TRENDING_KEYWORDS)
+BRAND_PATTERN = _keyword_pattern(brand_lower for _, brand_lower in BRAND_KEYWORDS)
+IMPACT_PATTERN = _keyword_pattern(IMPACT_KEYWORDS)
+TOURNAMENT_PATTERN = re.compile('|'.join(map(re.escape, TOURNAMENT_KEYWORDS)))
+
 class RealisticAnalysisReportGenerator:
     def __init__(self, db_path='poker_insight.db'):
         self.db_path = db_path
+        # 리포트 한 번 생성하는 동안 여러 섹션이 공유하는 분석 결과 (리포트마다 초기화)
+        self._snapshot_cache = None
+        self._quality_cache = None
+        # 리포트 생성 동안 모든 섹션이 공유하는 연결 (처음 필요할 때 연결, 페이지 캐시 유지)
+        self._conn = None
         
     def get_db_connection(self):
-        """SQLite 데이터베이스 연결"""
-        return sqlite3.connect(self.db_path)
+        """SQLite 데이터베이스 연결 (한 번 연결한 뒤에는 같은 연결 재사용)"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path)
+            # 조회 전용이므로 이 연결에만 적용되는 PRAGMA만 설정 (journal_mode는 DB 파일 설정이라 쓰는 쪽에 맡김)
+            self._conn.execute('PRAGMA cache_size=-65536')  # 64MB
+            self._conn.execute('PRAGMA temp_store=MEMORY')
+        return self._conn
+        
+    def close(self):
+        """재사용 중인 DB 연결 종료"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
         
     def generate_realistic_report(self):
         """현실적인 분석 리포트 생성"""
         logger.info("📊 현실적인 포커 시장 분석 시작...")
         
-        report_data = {
-            'report_metadata': self.get_report_metadata(),
-            'data_quality_assessment': self.assess_data_quality(),
-            'current_market_snapshot': self.analyze_current_snapshot(),
-            'comparative_analysis': self.perform_comparative_analysis(),
-            'news_based_insights': self.extract_news_insights(),
-            'actionable_recommendations': self.generate_realistic_recommendations(),
-            'data_limitations': self.document_data_limitations()
-        }
+        # 이전 리포트의 결과를 재사용하지 않도록 캐시 초기화
+        self._snapshot_cache = None
+        self._quality_cache = None
+        
+        try:
+            report_data = {
+                'report_metadata': self.get_report_metadata(),
+                'data_quality_assessment': self.assess_data_quality(),
+                'current_market_snapshot': self.analyze_current_snapshot(),
+                'comparative_analysis': self.perform_comparative_analysis(),
+                'news_based_insights': self.extract_news_insights(),
+                'actionable_recommendations': self.generate_realistic_recommendations(),
+                'data_limitations': self.document_data_limitations()
+            }
+        finally:
+            # 리포트 한 건의 조회가 모두 끝나면 연결 종료
+            self.close()
         
         return report_data
         
@@ -54,6 +103,12 @@ class RealisticAnalysisReportGenerator:
         }
         
     def assess_data_quality(self):
+        """데이터 품질 평가 (같은 리포트 안에서는 첫 결과 재사용)"""
+        if self._quality_cache is None:
+            self._quality_cache = self._assess_data_quality()
+        return self._quality_cache
+        
+    def _assess_data_quality(self):
         """데이터 품질 평가"""
         logger.info("  🔍 데이터 품질 평가...")
         
@@ -108,7 +163,6 @@ class RealisticAnalysisReportGenerator:
                 'questionable_sites': questionable_data
             }
             
-            conn.close()
             return quality_assessment
             
         except Exception as e:
@@ -132,6 +186,12 @@ class RealisticAnalysisReportGenerator:
             return "VERY_LOW"
             
     def analyze_current_snapshot(self):
+        """현재 시점 스냅샷 분석 (같은 리포트 안에서는 첫 결과 재사용)"""
+        if self._snapshot_cache is None:
+            self._snapshot_cache = self._analyze_current_snapshot()
+        return self._snapshot_cache
+        
+    def _analyze_current_snapshot(self):
         """현재 시점 스냅샷 분석"""
         logger.info("  📸 현재 시점 스냅샷 분석...")
         
@@ -156,23 +216,33 @@ class RealisticAnalysisReportGenerator:
             cursor.execute(query)
             results = cursor.fetchall()
             
-            # 현재 시장 구조 분석
-            total_players = sum(row[2] for row in results)
-            total_cash = sum(row[3] for row in results)
-            total_tournaments = sum(row[4] for row in results)
+            # 현재 시장 구조 분석 (합계와 제곱합은 SQLite 집계로 한 번에 계산)
+            cursor.execute("""
+            SELECT 
+                SUM(td.total_players),
+                SUM(td.cash_players),
+                SUM(td.tournament_players),
+                SUM(td.total_players * td.total_players)
+            FROM poker_sites ps
+            JOIN traffic_data td ON ps.id = td.site_id
+            WHERE td.total_players > 0
+            """)
+            total_players, total_cash, total_tournaments, sum_of_squares = cursor.fetchone()
             
-            # 시장 집중도 (HHI) 계산
-            market_shares = [(row[2] / total_players) * 100 for row in results]
-            hhi = sum(share ** 2 for share in market_shares)
+            # 시장 집중도 (HHI) 계산: 점유율(%) 제곱합 = 10000 * Σp² / (Σp)²
+            hhi = 10000 * sum_of_squares / (total_players * total_players)
             
-            # 상위 사이트 분석
+            # 상위 사이트 분석 (상위 N개 점유율은 누적 점유율에서 기록)
             top_sites = []
             cumulative_share = 0
+            top_shares = {}
             
             for i, row in enumerate(results):
                 name, url, players, cash, tournaments, rank = row
                 market_share = (players / total_players) * 100
                 cumulative_share += market_share
+                if i + 1 in (3, 5, 10):
+                    top_shares[i + 1] = cumulative_share
                 
                 # 플레이어 구성 분석
                 cash_ratio = (cash / players) * 100 if players > 0 else 0
@@ -204,9 +274,9 @@ class RealisticAnalysisReportGenerator:
                 'market_concentration': {
                     'hhi_index': round(hhi, 2),
                     'concentration_level': self.classify_concentration(hhi),
-                    'top3_share': round(sum(market_shares[:3]), 1),
-                    'top5_share': round(sum(market_shares[:5]), 1),
-                    'top10_share': round(sum(market_shares[:10]), 1)
+                    'top3_share': round(top_shares.get(3, cumulative_share), 1),
+                    'top5_share': round(top_shares.get(5, cumulative_share), 1),
+                    'top10_share': round(top_shares.get(10, cumulative_share), 1)
                 },
                 'player_distribution': {
                     'cash_percentage': round((total_cash / total_players) * 100, 1),
@@ -216,7 +286,6 @@ class RealisticAnalysisReportGenerator:
                 'site_rankings': top_sites
             }
             
-            conn.close()
             return snapshot
             
         except Exception as e:
@@ -379,7 +448,8 @@ class RealisticAnalysisReportGenerator:
             """
             
             cursor.execute(query)
-            news_data = cursor.fetchall()
+            # 제목/본문 소문자 변환은 기사마다 한 번만 수행하고 모든 분석에서 공유
+            news_data = [self.prepare_news_row(row) for row in cursor.fetchall()]
             
             # 실제 뉴스에서 인사이트 추출
             insights = {
@@ -391,71 +461,77 @@ class RealisticAnalysisReportGenerator:
                 'tournament_calendar': self.extract_tournament_info(news_data)
             }
             
-            conn.close()
             return insights
             
         except Exception as e:
             logger.error(f"뉴스 인사이트 추출 오류: {str(e)}")
             return {}
             
+    def prepare_news_row(self, row):
+        """뉴스 행을 분석용 dict로 변환 (소문자 제목/제목+본문 미리 계산)"""
+        title, content, category, author, published_date, url = row
+        title = title or ''
+        title_lower = title.lower()
+        return {
+            'title': title,
+            'category': category,
+            'published_date': published_date,
+            'title_lower': title_lower,
+            'text_lower': title_lower + ' ' + (content or '').lower()
+        }
+        
     def analyze_news_categories(self, news_data):
         """뉴스 카테고리 분석"""
-        categories = Counter()
-        for row in news_data:
-            category = row[2] or 'general'
-            categories[category] += 1
+        categories = Counter(news['category'] or 'general' for news in news_data)
         return dict(categories.most_common(5))
         
     def extract_trending_topics(self, news_data):
         """트렌딩 토픽 추출"""
-        keywords = ['WSOP', 'PokerStars', 'GGPoker', 'tournament', 'bracelet', 'high stakes', 'online poker']
         keyword_counts = Counter()
         
-        for row in news_data:
-            title = row[0] or ''
-            content = row[1] or ''
-            text = (title + ' ' + content).lower()
-            
-            for keyword in keywords:
-                if keyword.lower() in text:
+        for news in news_data:
+            # 한 번의 스캔으로 기사에 등장한 키워드 집합을 구하고, 집계 순서는 키워드 목록 순서 유지
+            found = set(TRENDING_PATTERN.findall(news['text_lower']))
+            if not found:
+                continue
+            for keyword, keyword_lower in TRENDING_KEYWORDS:
+                if keyword_lower in found:
                     keyword_counts[keyword] += 1
                     
         return dict(keyword_counts.most_common(5))
         
     def find_brand_mentions(self, news_data):
         """브랜드 언급 찾기"""
-        brands = ['PokerStars', 'GGPoker', 'WPT Global', '888poker', 'partypoker']
         brand_mentions = defaultdict(list)
         
-        for row in news_data:
-            title = row[0] or ''
-            
-            for brand in brands:
-                if brand.lower() in title.lower():
+        for news in news_data:
+            found = set(BRAND_PATTERN.findall(news['title_lower']))
+            if not found:
+                continue
+            for brand, brand_lower in BRAND_KEYWORDS:
+                if brand_lower in found:
                     brand_mentions[brand].append({
-                        'title': title,
-                        'category': row[2],
-                        'published_date': row[4]
+                        'title': news['title'],
+                        'category': news['category'],
+                        'published_date': news['published_date']
                     })
                     
         return dict(brand_mentions)
         
     def identify_market_impact_news(self, news_data):
         """시장 임팩트 뉴스 식별"""
-        impact_keywords = ['regulation', 'launch', 'partnership', 'acquisition', 'license', 'ban']
         impact_news = []
         
-        for row in news_data:
-            title = row[0] or ''
-            content = row[1] or ''
-            text = (title + ' ' + content).lower()
-            
-            if any(keyword in text for keyword in impact_keywords):
+        for news in news_data:
+            found = set(IMPACT_PATTERN.findall(news['text_lower']))
+            # 여러 키워드가 있으면 키워드 목록에서 앞선 것을 임팩트 유형으로
+            impact_type = next((kw for kw in IMPACT_KEYWORDS if kw in found), None)
+            if impact_type is not None:
                 impact_news.append({
-                    'title': title,
-                    'category': row[2],
-                    'published_date': row[4],
-                    'impact_type': [kw for kw in impact_keywords if kw in text][0]
+                    'title': news['title'],
+                    'category': news['category'],
+                    'published_date': news['published_date'],
+                    'impact_type': impact_type
                 })
                 
         return impact_news[:5]
@@ -463,16 +539,13 @@ class RealisticAnalysisReportGenerator:
     def extract_tournament_info(self, news_data):
         """토너먼트 정보 추출"""
         tournament_news = []
-        tournament_keywords = ['WSOP', 'WPT', 'EPT', 'tournament', 'bracelet']
         
-        for row in news_data:
-            title = row[0] or ''
-            
-            if any(keyword.lower() in title.lower() for keyword in tournament_keywords):
+        for news in news_data:
+            if TOURNAMENT_PATTERN.search(news['title_lower']):
                 tournament_news.append({
-                    'title': title,
-                    'category': row[2],
-                    'published_date': row[4]
+                    'title': news['title'],
+                    'category': news['category'],
+                    'published_date': news['published_date']
                 })
                 
         return tournament_news[:5]
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CloudScraper 공용 도우미
+- Cloudflare 챌린지 통과 세션(쿠키/User-Agent) 저장 및 복원
+- 수집기들이 같은 세션 파일을 공유하므로 형식 처리를 한 곳에서 관리
+- 일시적 실패를 재시도하는 GET
+"""
+import json
+import logging
+import random
+import time
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Cloudflare 챌린지 통과 쿠키/User-Agent 저장 파일 (다음 실행에서 챌린지 재풀이 생략)
+CF_SESSION_FILE = '.cf_cookies.json'
+
+def load_scraper_session(scraper, path=CF_SESSION_FILE):
+    """이전 실행에서 저장한 Cloudflare 쿠키와 User-Agent를 scraper에 복원하고 복원한 쿠키 수 반환
+    
+    파일이 없거나 깨졌거나 형식이 맞지 않으면 아무것도 복원하지 않고 0 반환
+    (GitHub Actions 캐시로 실행 간에 유지되는 파일이므로 잘못된 파일 때문에 수집기 생성이 실패하면 안 됨)
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            session = json.load(f)
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Cloudflare 세션 로드 실패: {str(e)}")
+        return 0
+    
+    # 전부 검증한 뒤에 적용 (중간에 실패해도 일부 쿠키만 남지 않도록)
+    try:
+        user_agent = session.get('user_agent')
+        cookies = [
+            (
+                cookie['name'], cookie['value'],
+                cookie.get('domain', ''), cookie.get('path', '/'), cookie.get('expires')
+            )
+            for cookie in session['cookies']
+        ]
+    except (AttributeError, KeyError, TypeError) as e:
+        logger.warning(f"⚠️ Cloudflare 세션 파일 형식 오류, 무시: {e!r}")
+        return 0
+    
+    # cf_clearance 쿠키는 발급 당시 User-Agent와 함께 써야 유효
+    if isinstance(user_agent, str):
+        scraper.headers['User-Agent'] = user_agent
+    for name, value, domain, path_, expires in cookies:
+        scraper.cookies.set(name, value, domain=domain, path=path_, expires=expires)
+    return len(cookies)
+
+def save_scraper_session(scraper, path=CF_SESSION_FILE):
+    """scraper의 Cloudflare 쿠키와 User-Agent 저장"""
+    session = {
+        'user_agent': scraper.headers.get('User-Agent'),
+        'cookies': [
+            {
+                'name': cookie.name,
+                'value': cookie.value,
+                'domain': cookie.domain,
+                'path': cookie.path,
+                'expires': cookie.expires
+            }
+            for cookie in scraper.cookies
+        ]
+    }
+    
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(session, f)
+    except OSError as e:
+        logger.warning(f"⚠️ Cloudflare 세션 저장 실패: {str(e)}")
+
+def get_with_retry(scraper, url, tries=4, **kwargs):
+    """일시적 실패(429, 5xx, 연결 오류)는 지터를 더한 지수 백오프로 재시도하는 GET (kwargs는 scraper.get에 전달)
+    
+    404/403 등 그 밖의 응답은 재시도하지 않고 그대로 반환하며, 마지막 시도의 결과(또는 예외)는 호출자에게 전달
+    """
+    for attempt in range(tries):
+        last_attempt = attempt == tries - 1
+        try:
+            response = scraper.get(url, **kwargs)
+            if last_attempt or (response.status_code < 500 and response.status_code != 429):
+                return response
+            reason = f"HTTP {response.status_code}"
+            response.close()  # 재시도 전에 실패한 응답의 연결 반납
+        except requests.RequestException as e:
+            if last_attempt:
+                raise
+            reason = str(e)
+        
+        delay = 2 ** attempt + random.random()
+        logger.warning(f"⚠️ {url} 요청 실패 ({reason}), {delay:.1f}초 후 재시도 ({attempt + 1}/{tries - 1})")
+        time.sleep(delay)
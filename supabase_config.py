@@ -11,11 +11,25 @@ from datetime import datetime, date
 from typing import Dict, List, Optional, Any
 import requests
 
+try:
+    import orjson
+except ImportError:  # orjson 미설치 시 표준 json 사용
+    orjson = None
+
 # Supabase 설정
 SUPABASE_URL = os.getenv('SUPABASE_URL', 'https://your-project.supabase.co')
 SUPABASE_ANON_KEY = os.getenv('SUPABASE_ANON_KEY', 'your-anon-key')
 SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_KEY', 'your-service-key')
 
+# daily_traffic UNIQUE 제약 컬럼 (upsert on_conflict 대상)
+DAILY_TRAFFIC_CONFLICT_COLUMNS = 'site_name,collection_date,collection_time'
+
+# daily_traffic 보조 인덱스 (대량 적재 전후 삭제/재생성 대상, UNIQUE 인덱스는 upsert에 필요하므로 제외)
+DAILY_TRAFFIC_INDEXES = {
+    'idx_daily_traffic_date': 'daily_traffic(collection_date DESC)',
+    'idx_daily_traffic_site': 'daily_traffic(site_name)'
+}
+
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -113,38 +127,65 @@ class SupabaseClient:
         CREATE INDEX IF NOT EXISTS idx_collection_stats_date ON collection_stats(collection_date DESC);
         """
         
+        # Supabase SQL 함수 실행
+        if self.exec_sql(create_tables_sql, timeout=30):
+            logger.info("✅ Supabase 테이블 생성 완료")
+            return True
+        logger.error("❌ 테이블 생성 실패")
+        return False
+    
+    def exec_sql(self, sql: str, timeout: int = 300) -> bool:
+        """exec_sql RPC로 SQL 실행"""
         try:
-            # Supabase SQL 함수 실행
             response = requests.post(
                 f"{self.base_url}/rest/v1/rpc/exec_sql",
                 headers=self.headers,
-                json={"sql": create_tables_sql},
-                timeout=30
+                json={"sql": sql},
+                timeout=timeout
             )
             
             if response.status_code in [200, 204]:
-                logger.info("✅ Supabase 테이블 생성 완료")
                 return True
             else:
-                logger.error(f"❌ 테이블 생성 실패: {response.status_code} - {response.text}")
+                logger.error(f"❌ SQL 실행 실패: {response.status_code} - {response.text}")
                 return False
                 
         except Exception as e:
-            logger.error(f"❌ 테이블 생성 오류: {e}")
+            logger.error(f"❌ SQL 실행 오류: {e}")
             return False
     
+    def drop_daily_traffic_indexes(self) -> bool:
+        """대량 적재 전 daily_traffic 보조 인덱스 삭제"""
+        sql = "\n".join(f"DROP INDEX IF EXISTS {name};" for name in DAILY_TRAFFIC_INDEXES)
+        if self.exec_sql(sql):
+            logger.info("✅ daily_traffic 인덱스 삭제 완료")
+            return True
+        return False
+    
+    def create_daily_traffic_indexes(self) -> bool:
+        """대량 적재 후 daily_traffic 보조 인덱스 재생성"""
+        sql = "\n".join(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {definition};"
+            for name, definition in DAILY_TRAFFIC_INDEXES.items()
+        )
+        if self.exec_sql(sql):
+            logger.info("✅ daily_traffic 인덱스 재생성 완료")
+            return True
+        return False
+    
     def insert_daily_traffic(self, data: List[Dict]) -> bool:
-        """일일 트래픽 데이터 삽입"""
+        """일일 트래픽 데이터 삽입 (같은 사이트/날짜/시간 행은 갱신하는 upsert)"""
         try:
             response = requests.post(
                 f"{self.base_url}/rest/v1/daily_traffic",
-                headers=self.headers,
-                json=data,
+                headers={**self.headers, 'Prefer': 'resolution=merge-duplicates,return=minimal'},
+                params={'on_conflict': DAILY_TRAFFIC_CONFLICT_COLUMNS},
+                data=orjson.dumps(data) if orjson is not None else json.dumps(data),
                 timeout=30
             )
             
             if response.status_code in [200, 201, 204]:
-                logger.info(f"✅ {len(data)}개 트래픽 데이터 삽입 완료")
+                logger.info("✅ %d개 트래픽 데이터 삽입 완료", len(data))
                 return True
             else:
                 logger.error(f"❌ 데이터 삽입 실패: {response.status_code} - {response.text}")